@@ -1,145 +1,409 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from paginas.Autoscraper.dominio.modelo import now_utc
+from paginas.Autoscraper.dominio.servicios import RESULTADOS
+from paginas.Autoscraper.infraestructura.metricas import METRICAS
+from paginas.Autoscraper.infraestructura.registro import Progreso
+import logging, time
+
+log = logging.getLogger(__name__)
 
 @dataclass
 class AppConfig:
     base_url: str
     out_csv: str
-    timeout: int
+    timeout: int  # de lectura
     retries: int
     fresh_days: int
     user_agent: str
+    concurrency: int = 1
+    batch_size: int = 50
+    engine: str = "sync"
+    rate_per_host: float = 1.25
+    pacing: str = "fixed"
+    max_rate: Optional[float] = None
+    parser: str = "strainer"
+    parse_workers: int = 0
+    store: str = "csv"
+    journal_max_mb: int = 64
+    cache_dir: Optional[str] = None
+    cache_max_mb: int = 512
+    cache_ttls: Dict[str, int] = field(default_factory=dict)
+    shard: Optional[Tuple[int, int]] = None  # (i, N) de --shard i/N
+    resume: bool = False
+    checkpoint: bool = False  # guardar el avance para poder reanudar (implícito con resume)
+    checkpoint_interval: float = 30.0  # segundos mínimos entre escrituras del checkpoint
+    frontier: str = "set"
+    frontier_capacity: int = 1_000_000
+    frontier_persist: bool = False
+    listing_bases: List[str] = field(default_factory=list)  # vacío: URL_BASE de PatioTuerca
+    history: bool = False  # historial de precio/kilometraje/estado junto a la salida
+    incremental: bool = False  # Autocor: cortar el recorrido en la primera página ya conocida
+    full_sweep_days: float = 7.0  # con incremental, cada cuánto se recorre el catálogo completo
+    connect_timeout: float = 5.0
+
+
+def _lotes(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Agrupa un iterable en listas de como máximo `size` elementos, sin leerlo entero."""
+    it = iter(items)
+    while True:
+        lote = list(islice(it, size))
+        if not lote:
+            return
+        yield lote
+
 
 class App:
-    def __init__(self, api, translator, repo, merger):
+    def __init__(self, api, translator, repo, merger, batch_size: int = 50, checkpoint=None,
+                 source: str = "", incremental=None, referencia=None):
         self.api = api
+        self.source = source  # etiqueta "fuente" de las métricas
         self.translator = translator
         self.repo = repo
         self.merger = merger
+        self.batch_size = max(1, int(batch_size))
+        self.checkpoint = checkpoint
+        self.incremental = incremental  # SincroniaIncremental (solo Autocor)
+        self.referencia = referencia  # shards: la salida final, solo lectura (ver shards.SalidaFinal)
+        self._merged = None
+        self._indice = None
+        self._skipped = 0
 
-    def run(self) -> None:
+    def run(self) -> Dict[str, int]:
         """
-        Ejecuta el proceso con batching:
-        - Autocor: lote por página.
-        - PatioTuerca: lote por año.
+        Ejecuta el proceso en streaming (descarga → traducción → merge → guardado):
+        - Autocor: lote por página, según van llegando.
+        - PatioTuerca: lotes de `batch_size` fichas dentro de cada año.
         - Otros: modo monolítico (compatibilidad).
+        Devuelve las métricas de la corrida (total, kept, updated, refreshed, added, skipped).
         """
-        if hasattr(self.api, "fetch_year") and hasattr(self.api, "anios"):
-            self._run_patiotuerca_by_year()
-        elif hasattr(self.api, "discover_first_page") and hasattr(self.api, "fetch_page"):
-            self._run_autocor_by_page()
+        t0 = time.monotonic()
+        if hasattr(self.api, "anios") and (hasattr(self.api, "iter_year") or hasattr(self.api, "fetch_year")):
+            metrics = self._run_patiotuerca_by_year()
+        elif hasattr(self.api, "iter_pages") or (
+            hasattr(self.api, "discover_first_page") and hasattr(self.api, "fetch_page")
+        ):
+            metrics = self._run_autocor_by_page()
         elif hasattr(self.api, "fetch_all"):
-            self._run_monolithic()
+            metrics = self._run_monolithic()
         else:
             raise RuntimeError("API no compatible con App.run()")
+        METRICAS.inc("run_seconds", time.monotonic() - t0, fuente=self.source)
+        for k in RESULTADOS:
+            METRICAS.inc("registros_total", metrics.get(k, 0), fuente=self.source, resultado=k)
+        self._log_stage_times()
+        return metrics
+
+    def close(self) -> None:
+        """
+        Libera los recursos del cliente (procesos de parseo), del repositorio y del historial
+        (conexiones). Si la corrida no terminó, guarda el avance confirmado del checkpoint.
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.guardar()
+        for part in (self.api, self.repo, self.referencia, getattr(self.merger, "on_change", None)):
+            if hasattr(part, "close"):
+                part.close()
+
+    # -----------------------
+    #  ETAPAS DEL PIPELINE
+    # -----------------------
+    def _translate(self, entities: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Traduce el lote completo (se materializa antes para no contarlo dentro del merge)."""
+        with METRICAS.medir("translate_seconds", fuente=self.source):
+            return [self.translator.build_csv_row(e) for e in entities]
+
+    def _save(self, op: str, rows) -> None:
+        with METRICAS.medir("save_seconds", fuente=self.source, op=op):
+            getattr(self.repo, op)(rows)
+
+    def _load(self) -> None:
+        """
+        Carga el estado inicial. Con repositorios indexados (lookup) no se trae
+        el dataset a memoria: cada lote consulta solo sus ids.
+        """
+        self._merged = None if hasattr(self.repo, "lookup") else self.repo.load()
+        # Vigencia precalculada del dataset en memoria: cada lote compara números, no fechas ISO
+        self._indice = None
+        if self._merged is not None and hasattr(self.merger, "indexar"):
+            self._indice = self.merger.indexar(self._merged)
+
+    def _total(self) -> int:
+        return self.repo.count() if self._merged is None else len(self._merged)
+
+    def _merge_and_save(self, entities, totals: Dict[str, int]) -> Dict[str, int]:
+        """Traduce, funde y persiste un lote. Devuelve las métricas del lote."""
+        if self._merged is None:
+            rows = self._translate(entities)
+            existing = self.repo.lookup(r.get("id_record", "") for r in rows)
+            self._de_referencia(existing, rows)
+            with METRICAS.medir("merge_seconds", fuente=self.source):
+                _, metrics, changed = self.merger.merge_with_changes(existing, rows, en_sitio=True)
+            self._save("append", changed)
+            metrics["total"] = self.repo.count()
+        else:
+            rows = self._translate(entities)
+            copiadas = self._de_referencia(self._merged, rows)
+            with METRICAS.medir("merge_seconds", fuente=self.source):
+                self._merged, metrics, changed = self.merger.merge_with_changes(
+                    self._merged, rows, indice=self._indice, en_sitio=True)
+            for key, fila in copiadas.items():
+                # Sin cambios frente a la salida final: no es parte de lo que guarda este shard
+                if self._merged.get(key) is fila:
+                    del self._merged[key]
+                    if self._indice is not None:
+                        self._indice.olvidar(key)
+            if hasattr(self.repo, "append"):
+                # Solo las filas nuevas/actualizadas; la compactación va en _finish()
+                self._save("append", changed)
+            else:
+                self._save("save", self._merged)
+        for k in RESULTADOS:
+            totals[k] += metrics.get(k, 0)
+        return metrics
+
+    def _de_referencia(self, existing: Dict[str, Dict[str, Any]],
+                       rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Con `referencia`, copia a `existing` las filas de la salida final de los ids del lote que
+        `existing` no tiene, para que el merge compare vigencia y hash contra lo ya guardado.
+        Devuelve las filas copiadas.
+        """
+        if self.referencia is None:
+            return {}
+        faltan = [k for k in (str(r.get("id_record", "")).strip() for r in rows) if k and k not in existing]
+        copiadas = self.referencia.lookup(faltan) if faltan else {}
+        existing.update(copiadas)
+        return copiadas
+
+    def _finish(self) -> None:
+        """Cierre de corrida: compacta los repositorios incrementales en un CSV ordenado."""
+        if self._merged is not None and hasattr(self.repo, "append"):
+            self._save("save", self._merged)
+        if self.checkpoint is not None:
+            # Corrida completa: la próxima empieza de cero
+            self.checkpoint.terminar()
+
+    def _start_checkpoint(self) -> None:
+        if self.checkpoint is None:
+            return
+        if self.checkpoint.reanudado:
+            hechos = " | ".join(f"{k}={v}" for k, v in self.checkpoint.resumen().items()) or "nada"
+            log.info("↻ Reanudando desde %s → hechos: %s | posición: %s",
+                     self.checkpoint.path, hechos, self.checkpoint.posicion or "-")
+        if hasattr(self.api, "set_checkpoint"):
+            self.api.set_checkpoint(self.checkpoint)
 
     # -----------------------
     #  MODO BATCH: PATIOTUERCA
     # -----------------------
-    def _run_patiotuerca_by_year(self) -> None:
+    def _iter_year(self, anio: int) -> Iterator[Dict[str, Any]]:
+        if hasattr(self.api, "iter_year"):
+            return self.api.iter_year(anio)
+        return iter(self.api.fetch_year(anio))
+
+    def _run_patiotuerca_by_year(self) -> Dict[str, int]:
         """
-        PatioTuerca se procesa por lotes de año.
-        Se guarda el CSV después de cada año para no perder progreso.
+        PatioTuerca se procesa año por año, en lotes de `batch_size` fichas.
+        Se guarda el CSV después de cada lote para no perder progreso.
         """
-        print("▶ Ejecutando en modo batch por año (PatioTuerca)")
+        log.info("▶ Ejecutando en modo streaming por año (PatioTuerca)")
 
         # Cargar CSV existente una sola vez
-        merged = self.repo.load()
-        total_metrics = {"kept": 0, "updated": 0, "added": 0}
+        self._load()
+        total_metrics = dict.fromkeys(RESULTADOS, 0)
+        self._skipped = 0
+        if hasattr(self.api, "set_skip_filter"):
+            self.api.set_skip_filter(self._is_known_fresh)
+        self._start_checkpoint()
+        progreso = Progreso(log, "fichas guardadas")
 
         for anio in self.api.anios:
-            print(f"\n📆 Procesando año {anio}...")
-            entities = self.api.fetch_year(anio)
+            log.info("📆 Procesando año %s...", anio)
+            year_metrics = dict.fromkeys(RESULTADOS, 0)
+            skipped_before = self._skipped
 
-            if not entities:
-                print(f"  (sin resultados para {anio})")
+            for lote in _lotes(self._iter_year(anio), self.batch_size):
+                self._merge_and_save(lote, year_metrics)
+                if self.checkpoint is not None:
+                    # El lote ya está guardado: sus fichas y las marcas del crawler hasta aquí quedan hechas
+                    for e in lote:
+                        if e.get("url"):
+                            self.checkpoint.marcar("url", e["url"])
+                    self.checkpoint.confirmar()
+                log.debug("✓ Lote de %d fichas guardado en: %s", len(lote), self.repo.path)
+                progreso.tick(len(lote), f"año {anio}")
+
+            if not any(year_metrics.values()):
+                if self._skipped > skipped_before:
+                    log.info("(año %s: todas las fichas vigentes, nada que descargar)", anio)
+                else:
+                    log.info("(sin resultados para %s)", anio)
                 continue
 
-            incoming_rows = [self.translator.build_csv_row(e) for e in entities]
+            for k in RESULTADOS:
+                total_metrics[k] += year_metrics[k]
+            log.info("✓ Año %s: total_now=%s | kept=%d | updated=%d | refreshed=%d | added=%d", anio,
+                     self._total(), year_metrics["kept"], year_metrics["updated"], year_metrics["refreshed"],
+                     year_metrics["added"])
 
-            merged, metrics = self.merger.merge(merged, incoming_rows)
+        self._finish()
+        total = self._total()
+        log.info(
+            "✓ Merge completado (todos los años) → Total filas: %s | Conservadas vigentes: %d | "
+            "Con cambios: %d | Refrescadas sin cambios: %d | Nuevas: %d | Omitidas sin descargar (vigentes): %d",
+            total, total_metrics["kept"], total_metrics["updated"], total_metrics["refreshed"],
+            total_metrics["added"], self._skipped,
+        )
+        log.info("✓ CSV final: %s", self.repo.path)
+        self._log_client_stats()
+        return {"total": total, **total_metrics, "skipped": self._skipped}
 
-            # Acumular métricas
-            for k in ("kept", "updated", "added"):
-                total_metrics[k] += metrics.get(k, 0)
+    def _log_client_stats(self) -> None:
+        """Contadores que exponga el cliente (caché HTTP, etc.) en el resumen de la corrida."""
+        stats = self.api.stats() if hasattr(self.api, "stats") else {}
+        for name, values in stats.items():
+            log.info("✓ %s: %s", name, " | ".join(f"{k}={v}" for k, v in values.items()))
 
-            # Guardar después de cada año
-            self.repo.save(merged)
-            print(
-                f"  ✓ Año {anio}: total_now={metrics['total']} | "
-                f"kept={metrics['kept']} | updated={metrics['updated']} | added={metrics['added']}"
-            )
-            print(f"  ✓ CSV parcial guardado en: {self.repo.path}")
+    def _log_stage_times(self) -> None:
+        """
+        Reparto del tiempo de la corrida: red, esperas, parseo, traducción, merge y guardado.
+        Con concurrencia son segundos sumados entre hilos, no de reloj (pueden superar run_seconds).
+        """
+        etapas = {
+            "red": "http_fetch_seconds",
+            "esperas": "sleep_seconds_total",
+            "parseo": "parse_seconds",
+            "traducción": "translate_seconds",
+            "merge": "merge_seconds",
+            "guardado": "save_seconds",
+        }
+        filtro = {"fuente": self.source} if self.source else {}
+        partes = [f"{k}={METRICAS.total(v, **filtro):.2f}" for k, v in etapas.items()]
+        log.info("✓ tiempos (s): %s", " | ".join(partes))
 
-        total = len(merged)
-        print(
-            f"\n✓ Merge completado (todos los años) → Total filas: {total} | "
-            f"Conservadas vigentes: {total_metrics['kept']} | "
-            f"Actualizadas: {total_metrics['updated']} | "
-            f"Nuevas: {total_metrics['added']}"
-        )
-        print(f"✓ CSV final: {self.repo.path}")
+    def _is_known_fresh(self, key: str) -> bool:
+        """True si el id ya está guardado (o, en un shard, en la salida final) y la política lo considera vigente."""
+        if self._merged is None:
+            existing = self.repo.lookup([key])
+        else:
+            existing = self._merged
+        indice = self._indice
+        if key not in existing and self.referencia is not None:
+            existing, indice = self.referencia.lookup([key]), None
+        if key not in existing:
+            return False
+        if hasattr(self.merger, "vigentes"):
+            fresca = key in self.merger.vigentes(existing, [key], indice)
+        else:
+            fresca = self.merger.freshness.is_fresh(existing[key], now_utc())
+        if not fresca:
+            return False
+        self._skipped += 1
+        return True
 
     # -----------------------
     #  MODO BATCH: AUTOCOR
     # -----------------------
-    def _run_autocor_by_page(self) -> None:
+    def _iter_pages(self) -> Iterator[tuple]:
+        done = set()
+        if self.checkpoint is not None:
+            done = {int(p) for p in self.checkpoint.hechos("pagina")}
+        if hasattr(self.api, "iter_pages"):
+            yield from self.api.iter_pages(skip=done) if done else self.api.iter_pages()
+            return
+        page_count, entities_page1 = self.api.discover_first_page()
+        if 1 not in done:
+            yield 1, entities_page1
+        for p in range(2, page_count + 1):
+            if p not in done:
+                yield p, self.api.fetch_page(p)
+
+    def _run_autocor_by_page(self) -> Dict[str, int]:
         """
-        Procesa Autocor por lotes de página.
+        Procesa Autocor por lotes de página, a medida que se descargan.
         Guarda el CSV después de cada página.
         """
-        print("▶ Ejecutando en modo batch por página (Autocor)")
-
-        merged = self.repo.load()
-        total_metrics = {"kept": 0, "updated": 0, "added": 0}
+        log.info("▶ Ejecutando en modo streaming por página (Autocor)")
 
-        # Página 1
-        page_count, entities_page1 = self.api.discover_first_page()
-        print(f"  📄 Total de páginas reportadas: {page_count}")
-
-        # Procesar página 1
-        pages = [(1, entities_page1)]
-
-        # Páginas 2...N
-        for p in range(2, page_count + 1):
-            pages.append((p, self.api.fetch_page(p)))
+        self._load()
+        total_metrics = dict.fromkeys(RESULTADOS, 0)
+        self._start_checkpoint()
+        barrido = self._start_incremental()
+        progreso = Progreso(log, "páginas procesadas")
 
-        # Procesar lote por lote
-        for page_num, page_entities in pages:
-            print(f"\n📄 Procesando página {page_num}/{page_count}...")
+        for page_num, page_entities in self._iter_pages():
+            page_count = getattr(self.api, "page_count", "?")
+            if page_num == 1:
+                log.info("📄 Total de páginas reportadas: %s", page_count)
+            log.debug("📄 Procesando página %s/%s...", page_num, page_count)
 
+            if self.incremental is not None:
+                self.incremental.observar(page_entities)
             if not page_entities:
-                print("  (página vacía)")
+                log.debug("(página %s vacía)", page_num)
+                self._mark_page_done(page_num)
+                progreso.tick(detalle=f"de {page_count}")
                 continue
 
-            incoming_rows = [self.translator.build_csv_row(e) for e in page_entities]
-            merged, metrics = self.merger.merge(merged, incoming_rows)
-
-            # Acumular métricas totales
-            for k in ("kept", "updated", "added"):
-                total_metrics[k] += metrics.get(k, 0)
-
-            # Guardado por página
-            self.repo.save(merged)
-            print(
-                f"  ✓ Página {page_num}: total_now={metrics['total']} | "
-                f"kept={metrics['kept']} | updated={metrics['updated']} | added={metrics['added']}"
-            )
-            print(f"  ✓ Guardado parcial en: {self.repo.path}")
-
-        total = len(merged)
-        print(
-            f"\n✓ Merge completado (todas las páginas) → Total filas: {total} | "
-            f"Conservadas vigentes: {total_metrics['kept']} | "
-            f"Actualizadas: {total_metrics['updated']} | "
-            f"Nuevas: {total_metrics['added']}"
+            metrics = self._merge_and_save(page_entities, total_metrics)
+            self._mark_page_done(page_num)
+            log.debug("✓ Página %s: total_now=%s | kept=%d | updated=%d | refreshed=%d | added=%d", page_num,
+                      metrics["total"], metrics["kept"], metrics["updated"], metrics["refreshed"], metrics["added"])
+            progreso.tick(detalle=f"de {page_count}")
+
+        self._finish()
+        if self.incremental is not None:
+            self.incremental.confirmar(barrido)
+            if getattr(self.api, "stopped_at", None) is not None:
+                log.info("✓ Sincronización incremental: recorrido cortado en la página %s de %s (ya conocida)",
+                         self.api.stopped_at, getattr(self.api, "page_count", "?"))
+        total = self._total()
+        log.info(
+            "✓ Merge completado (todas las páginas) → Total filas: %s | Conservadas vigentes: %d | "
+            "Con cambios: %d | Refrescadas sin cambios: %d | Nuevas: %d",
+            total, total_metrics["kept"], total_metrics["updated"], total_metrics["refreshed"],
+            total_metrics["added"],
         )
-        print(f"✓ CSV final: {self.repo.path}")
+        log.info("✓ CSV final: %s", self.repo.path)
+        self._log_client_stats()
+        return {"total": total, **total_metrics, "skipped": 0}
+
+    def _start_incremental(self) -> bool:
+        """
+        Con sincronización incremental, decide si esta corrida es un barrido completo y, si no,
+        le pasa al cliente el criterio de corte. Devuelve True si se recorre todo el catálogo.
+        """
+        if self.incremental is None or not hasattr(self.api, "set_stop_filter"):
+            return True
+        if self.incremental.toca_barrido():
+            log.info("▶ Sincronización incremental: toca barrido completo (cada %s días)",
+                     self.incremental.barrido_dias)
+            self.api.set_stop_filter(None)
+            return True
+        log.info("▶ Sincronización incremental: hasta la primera página ya conocida")
+        self.api.set_stop_filter(lambda entidades: self.incremental.pagina_conocida(entidades, self._is_stored))
+        return False
+
+    def _is_stored(self, key: str) -> bool:
+        if not key:
+            return False
+        if self._merged is None:
+            return key in self.repo.lookup([key])
+        return key in self._merged
+
+    def _mark_page_done(self, page_num: int) -> None:
+        if self.checkpoint is not None:
+            self.checkpoint.posicion = {"pagina": page_num}
+            self.checkpoint.marcar("pagina", page_num)
+            self.checkpoint.confirmar()
 
     # -----------------------
     #  MODO MONOLÍTICO
     # -----------------------
-    def _run_monolithic(self) -> None:
+    def _run_monolithic(self) -> Dict[str, int]:
         """Modo original (no batch)."""
 
         if hasattr(self.api, "fetch_all"):
@@ -149,15 +413,15 @@ class App:
             for p in range(2, page_count + 1):
                 entities.extend(self.api.fetch_page(p))
 
-        incoming_rows = [self.translator.build_csv_row(e) for e in entities]
+        incoming_rows = self._translate(entities)
 
         existing = self.repo.load()
-        merged, metrics = self.merger.merge(existing, incoming_rows)
+        with METRICAS.medir("merge_seconds", fuente=self.source):
+            merged, metrics = self.merger.merge(existing, incoming_rows, en_sitio=True)
 
-        self.repo.save(merged)
+        self._save("save", merged)
 
-        print(
-            f"✓ Merge completado → Total: {metrics['total']} | "
-            f"kept={metrics['kept']} | updated={metrics['updated']} | added={metrics['added']}"
-        )
-        print(f"✓ CSV: {self.repo.path}")
\ No newline at end of file
+        log.info("✓ Merge completado → Total: %s | kept=%d | updated=%d | refreshed=%d | added=%d",
+                 metrics["total"], metrics["kept"], metrics["updated"], metrics["refreshed"], metrics["added"])
+        log.info("✓ CSV: %s", self.repo.path)
+        return {**metrics, "skipped": 0}
@@ -0,0 +1,191 @@
+"""
+Benchmark de punta a punta de App contra el servidor local (sin red).
+
+    python -m paginas.Autoscraper.bench.e2e [--fuentes autocor,patiotuerca] [--tamanos 200,2000]
+        [--latencia 0.005] [--errores 0] [--resultados RUTA.jsonl] [--comparar]
+
+Arma cada fuente con main.build_app (los mismos componentes de una corrida real), mide
+páginas/s, registros/s y el tiempo en descarga, parseo, traducción, merge y guardado, y
+agrega el resultado al archivo jsonl (por defecto <tmp>/autoscraper_bench/e2e.jsonl, fuera
+de datos/ para no mezclarse con las salidas reales). Con --comparar contrasta con la corrida anterior de
+la misma configuración y falla si registros/s cae más de --tolerancia.
+"""
+from __future__ import annotations
+import argparse, json, logging, os, platform, subprocess, sys, tempfile, threading, time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+from paginas.Autoscraper.app import AppConfig
+from paginas.Autoscraper.dominio.servicios import RESULTADOS
+from paginas.Autoscraper.main import build_app
+from paginas.Autoscraper.infraestructura.api_cliente_PatioTuerca import FichaExtractor
+from paginas.Autoscraper.infraestructura.registro import RAIZ
+from paginas.Autoscraper.infraestructura.ritmo import AimdPacer
+from paginas.Autoscraper.bench.servidor import ServidorSimulado
+
+ETAPAS = ("fetch", "parse", "translate", "merge", "save")
+
+
+class Etapas:
+    """Acumula segundos y llamadas por etapa envolviendo métodos de los componentes."""
+
+    def __init__(self):
+        self.segundos: Dict[str, float] = defaultdict(float)
+        self.llamadas: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def cronometrar(self, etapa: str, fn: Callable) -> Callable:
+        def envuelta(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.segundos[etapa] += time.perf_counter() - t0
+                    self.llamadas[etapa] += 1
+        return envuelta
+
+    def envolver(self, obj: Any, metodo: str, etapa: str) -> None:
+        if hasattr(obj, metodo):
+            setattr(obj, metodo, self.cronometrar(etapa, getattr(obj, metodo)))
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def medir(fuente: str, tamano: int, args: argparse.Namespace) -> Dict[str, Any]:
+    catalogo = {"autocor": tamano} if fuente == "autocor" else {"patiotuerca": tamano}
+    with ServidorSimulado(**catalogo, por_pagina=args.por_pagina, latencia=args.latencia,
+                          errores=args.errores) as sim, tempfile.TemporaryDirectory() as tmp:
+        cfg = AppConfig(
+            base_url=sim.url_autocor,
+            out_csv=os.path.join(tmp, f"{fuente}_fichas.csv"),
+            timeout=10,
+            retries=3,
+            fresh_days=1,
+            user_agent="bench",
+            concurrency=args.concurrency,
+            engine=args.engine,
+            parser=args.parser,
+            store=args.store,
+            listing_bases=sim.bases_patiotuerca,
+            # El token-bucket del motor async también frena (1,25 peticiones/s por host por defecto)
+            rate_per_host=AppConfig.rate_per_host if args.ritmo_real else 1e6,
+        )
+        app = build_app(fuente, cfg)
+        web = app.api.repo.web if fuente == "patiotuerca" else app.api
+        if not args.ritmo_real:
+            # Sin pausas: se mide el pipeline, no la cortesía con el sitio
+            web.pacer = AimdPacer(rate=1e6, min_rate=1e6, max_rate=1e6, jitter=0.0)
+
+        etapas = Etapas()
+        etapas.envolver(web, "fetch_html" if fuente == "patiotuerca" else "_fetch_page", "fetch")
+        etapas.envolver(app.translator, "build_csv_row", "translate")
+        etapas.envolver(app.merger, "merge_with_changes", "merge")
+        etapas.envolver(app.repo, "append", "save")
+        etapas.envolver(app.repo, "save", "save")
+        parsear_original = FichaExtractor.__dict__["parsear_html"]
+        FichaExtractor.parsear_html = staticmethod(etapas.cronometrar("parse", parsear_original.__func__))
+
+        t0 = time.perf_counter()
+        try:
+            metrics = app.run()
+        finally:
+            FichaExtractor.parsear_html = parsear_original
+            app.close()
+        dt = time.perf_counter() - t0
+
+    paginas = sim.contadores["api"] + sim.contadores["listado"] + sim.contadores["ficha"]
+    registros = sum(metrics.get(k, 0) for k in RESULTADOS)
+    return {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "fuente": fuente,
+        "tamano": tamano,
+        "engine": args.engine if fuente == "patiotuerca" else "sync",
+        "store": args.store,
+        "concurrency": args.concurrency,
+        "latencia": args.latencia,
+        "errores": args.errores,
+        "segundos": round(dt, 3),
+        "paginas": paginas,
+        "registros": registros,
+        "paginas_s": round(paginas / dt, 1),
+        "registros_s": round(registros / dt, 1),
+        "etapas_s": {e: round(etapas.segundos.get(e, 0.0), 3) for e in ETAPAS},
+        "errores_servidos": sim.contadores["errores"],
+    }
+
+
+_CLAVE = ("fuente", "tamano", "engine", "store", "concurrency", "latencia", "errores")
+
+
+def anterior(path: str, r: Dict[str, Any]) -> Dict[str, Any] | None:
+    """Última corrida guardada con la misma configuración."""
+    if not os.path.exists(path):
+        return None
+    previo = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if all(rec.get(k) == r[k] for k in _CLAVE):
+                previo = rec
+    return previo
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fuentes", default="autocor,patiotuerca")
+    ap.add_argument("--tamanos", default="200,2000", help="Registros del catálogo, separados por coma")
+    ap.add_argument("--por-pagina", type=int, default=20)
+    ap.add_argument("--latencia", type=float, default=0.005, help="Segundos por respuesta del servidor")
+    ap.add_argument("--errores", type=float, default=0.0, help="Proporción de respuestas 503")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--engine", choices=["sync", "async"], default="sync")
+    ap.add_argument("--parser", choices=["strainer", "soup"], default="strainer")
+    ap.add_argument("--store", choices=["csv", "journal", "sqlite"], default="csv")
+    ap.add_argument("--ritmo-real", action="store_true", help="Mantiene el ritmo adaptativo de producción")
+    ap.add_argument("--resultados", default=os.path.join(tempfile.gettempdir(), "autoscraper_bench", "e2e.jsonl"))
+    ap.add_argument("--comparar", action="store_true", help="Compara con la corrida anterior equivalente")
+    ap.add_argument("--tolerancia", type=float, default=0.10, help="Caída de registros/s tolerada")
+    args = ap.parse_args()
+    # Solo la tabla de resultados: ni progreso ni avisos de los errores inyectados
+    logging.getLogger(RAIZ).setLevel(logging.CRITICAL)
+
+    resultados: List[Dict[str, Any]] = []
+    regresiones = 0
+    print(f"{'fuente':12s} {'tamaño':>7s} {'seg':>7s} {'pág/s':>8s} {'reg/s':>8s}  "
+          + " ".join(f"{e:>9s}" for e in ETAPAS))
+    for fuente in [f.strip() for f in args.fuentes.split(",") if f.strip()]:
+        for tamano in [int(t) for t in args.tamanos.split(",") if t.strip()]:
+            r = medir(fuente, tamano, args)
+            previo = anterior(args.resultados, r) if args.comparar else None
+            resultados.append(r)
+            linea = (f"{fuente:12s} {tamano:7d} {r['segundos']:7.2f} {r['paginas_s']:8.1f} {r['registros_s']:8.1f}  "
+                     + " ".join(f"{r['etapas_s'][e]:9.3f}" for e in ETAPAS))
+            if previo and previo.get("registros_s"):
+                cambio = r["registros_s"] / previo["registros_s"] - 1
+                linea += f"  {cambio:+.0%} vs {previo.get('commit') or previo['fecha']}"
+                if cambio < -args.tolerancia:
+                    linea += "  ⚠️ REGRESIÓN"
+                    regresiones += 1
+            print(linea)
+
+    os.makedirs(os.path.dirname(args.resultados) or ".", exist_ok=True)
+    with open(args.resultados, "a", encoding="utf-8") as f:
+        for r in resultados:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    print(f"Resultados agregados a {args.resultados}")
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Paridad y velocidad de los motores de FichaExtractor.
+
+    python -m paginas.Autoscraper.bench.extractor [--paginas DIR] [-n 300]
+
+Con --paginas se usan fichas guardadas (*.html; el nombre del archivo es el id del anuncio),
+si no, las de datos/patiotuerca_fichas.csv y luego sintéticas; siempre se suman los casos
+borde de sinteticos.paginas_borde(). Falla si algún motor no devuelve exactamente lo mismo
+que "soup".
+"""
+from __future__ import annotations
+import argparse, glob, os, sys, time
+from paginas.Autoscraper.infraestructura.api_cliente_PatioTuerca import FichaExtractor
+from paginas.Autoscraper.bench.sinteticos import paginas_borde, paginas_ficha
+
+
+def cargar(directorio: str | None, n: int):
+    if not directorio:
+        return list(paginas_ficha(n)) + paginas_borde()
+    paginas = []
+    for path in sorted(glob.glob(os.path.join(directorio, "*.html")))[:n]:
+        vid = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding="utf-8", errors="replace") as f:
+            paginas.append((f"https://ecuador.patiotuerca.com/vehicle/x/{vid}", f.read()))
+    return paginas + paginas_borde()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--paginas", default=None, help="Directorio con fichas guardadas (*.html)")
+    ap.add_argument("-n", type=int, default=300)
+    args = ap.parse_args()
+
+    paginas = cargar(args.paginas, args.n)
+    motores = ["soup", "strainer"]
+    referencia = [FichaExtractor.parsear_html(h, u, motor="soup") for u, h in paginas]
+
+    print(f"{len(paginas)} fichas, {sum(len(h) for _, h in paginas) / len(paginas) / 1024:.0f} KiB promedio")
+    fallos = 0
+    for motor in motores:
+        t0 = time.perf_counter()
+        salida = [FichaExtractor.parsear_html(h, u, motor=motor) for u, h in paginas]
+        dt = time.perf_counter() - t0
+        distintas = sum(1 for a, b in zip(salida, referencia) if a != b)
+        fallos += distintas
+        print(f"  {motor:9s} {len(paginas) / dt:8.1f} fichas/s   diferencias vs soup: {distintas}")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Paridad y velocidad del escáner JSON-LD de los listados frente al DOM completo.
+
+    python -m paginas.Autoscraper.bench.listado [--paginas DIR] [-n 300]
+
+Con --paginas se usan listados guardados (*.html), si no, páginas sintéticas.
+Falla si el escáner no devuelve exactamente las mismas URLs que BeautifulSoup.
+"""
+from __future__ import annotations
+import argparse, glob, os, sys, time
+from paginas.Autoscraper.infraestructura.api_cliente_PatioTuerca import (
+    escanear_urls_jsonld,
+    extraer_urls_jsonld_dom,
+)
+from paginas.Autoscraper.bench.sinteticos import paginas_listado
+
+# Casos borde que el escáner debe resolver igual que el DOM
+_BORDES = [
+    '<script type="application/ld+json">{"@type":"Car","url":"/a/1"}</script>',
+    "<SCRIPT data-x='1' type='application/ld+json' >[{\"@type\":\"Car\",\"url\":\"/a/2\"},"
+    '{"@type":"Offer"}]</SCRIPT >',
+    '<script type="application/ld+json">{roto</script><script type="application/ld+json">'
+    '{"@type":"Car","url":"/a/3"}</script>',
+    '<script data-type="application/ld+json">{"@type":"Car","url":"/no"}</script>',
+    '<script type="application/LD+JSON">{"@type":"Car","url":"/no"}</script>',
+    '<script type="application/ld+json"></script><p>sin autos</p>',
+    '<script type="application/ld+json">[{"@type":"Car","url":"/a/4"}, 3]</script>',
+]
+
+
+def cargar(directorio: str | None, n: int):
+    if not directorio:
+        return list(paginas_listado(n))
+    paginas = []
+    for path in sorted(glob.glob(os.path.join(directorio, "*.html")))[:n]:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            paginas.append((path, f.read()))
+    return paginas
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--paginas", default=None, help="Directorio con listados guardados (*.html)")
+    ap.add_argument("-n", type=int, default=300)
+    args = ap.parse_args()
+
+    paginas = cargar(args.paginas, args.n)
+    bordes = sum(1 for h in _BORDES if list(escanear_urls_jsonld(h)) != extraer_urls_jsonld_dom(h))
+    print(f"{len(paginas)} listados, {sum(len(h) for _, h in paginas) / len(paginas) / 1024:.0f} KiB promedio"
+          f" | casos borde distintos: {bordes}")
+
+    resultados = {}
+    for nombre, fn in (("dom", extraer_urls_jsonld_dom), ("escaner", lambda h: list(escanear_urls_jsonld(h)))):
+        t0 = time.perf_counter()
+        resultados[nombre] = [fn(h) for _, h in paginas]
+        dt = time.perf_counter() - t0
+        print(f"  {nombre:8s} {len(paginas) / dt:8.1f} listados/s")
+    distintas = sum(1 for a, b in zip(resultados["escaner"], resultados["dom"]) if a != b)
+    print(f"  diferencias escaner vs dom: {distintas}")
+    sys.exit(1 if distintas or bordes else 0)
+
+
+if __name__ == "__main__":
+    main()
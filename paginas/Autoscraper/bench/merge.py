@@ -0,0 +1,170 @@
+"""
+Merge por lotes sobre un dataset grande: el algoritmo anterior (copia completa de
+`existing` y parseo ISO de cada fila existente en cada lote) frente al actual
+(fusión en sitio con índice de vigencia precalculado).
+
+    python -m paginas.Autoscraper.bench.merge [--existentes 100000] [--lotes 100] [--tamano-lote 50]
+
+Falla si las métricas por lote o el dataset final difieren, o si hash_contenido de Autocor
+no es estable: la misma ficha descargada otro día (con otro processedAt y days_in_stock)
+debe dar el mismo hash y quedar sin cambios en el merge, aunque llegue con las claves en
+otro orden; un cambio de precio, no.
+"""
+from __future__ import annotations
+import argparse, datetime, random, sys, time
+from typing import Any, Dict, Iterable, List, Tuple
+from paginas.Autoscraper.dominio.modelo import now_utc
+from paginas.Autoscraper.dominio.politicas import ByDaysFreshnessPolicy
+from paginas.Autoscraper.dominio.servicios import MergeService
+from paginas.Autoscraper.infraestructura.traductor import AutocorRecordTranslator
+from paginas.Autoscraper.bench.sinteticos import entidad_autocor
+
+Filas = Dict[str, Dict[str, Any]]
+
+
+def merge_anterior(policy, existing: Filas, incoming_rows: Iterable[Dict[str, Any]],
+                   id_field: str = "id_record") -> Tuple[Filas, Dict[str, int]]:
+    """Copia literal del MergeService.merge_with_changes previo, como referencia."""
+    ref = now_utc()
+    merged = dict(existing)
+    kept = updated = added = 0
+    for row in incoming_rows:
+        key = str(row.get(id_field, "")).strip()
+        if not key:
+            merged[f"__NOID__{id(row)}"] = row
+            added += 1
+            continue
+        if key in existing:
+            if policy.is_fresh(existing[key], ref):
+                kept += 1
+            else:
+                merged[key] = row
+                updated += 1
+        else:
+            merged[key] = row
+            added += 1
+    return merged, {"kept": kept, "updated": updated, "added": added, "total": len(merged)}
+
+
+def _fila(key: str, segundos: float, ahora: datetime.datetime) -> Dict[str, Any]:
+    fecha = (ahora - datetime.timedelta(seconds=segundos)).strftime("%Y-%m-%d %H:%M:%S")
+    return {"id_record": key, "fecha_ingreso": fecha, "precio": int(segundos) % 100_000}
+
+
+def dataset(n: int, rnd: random.Random) -> Filas:
+    """
+    Existentes ingresados en 20 corridas diarias a ~20 fichas/s (la mitad vigentes con
+    ventana de 10 días), en orden aleatorio, y algunas sin fecha.
+    """
+    ahora = now_utc()
+    orden = list(range(n))
+    rnd.shuffle(orden)
+    filas = {}
+    for i, pos in enumerate(orden):
+        corrida, en_corrida = divmod(pos, -(-n // 20))
+        fila = _fila(str(i), corrida * 86_400 + 43_200 - en_corrida // 20, ahora)
+        if i % 97 == 0:
+            fila["fecha_ingreso"] = rnd.choice(["", None, "sin fecha"])
+        filas[str(i)] = fila
+    return filas
+
+
+def lotes(existentes: int, n: int, tamano: int, rnd: random.Random) -> List[List[Dict[str, Any]]]:
+    """Mezcla de ids existentes, nuevos, repetidos dentro del lote y filas sin id."""
+    ahora = now_utc()
+    salida = []
+    siguiente = existentes
+    for _ in range(n):
+        lote = []
+        for _ in range(tamano):
+            r = rnd.random()
+            if r < 0.6:
+                key = str(rnd.randrange(existentes))
+            elif r < 0.98:
+                key = str(siguiente)
+                siguiente += 1
+            else:
+                key = ""
+            lote.append(_fila(key, 0, ahora))
+        lote.extend(dict(f) for f in rnd.sample(lote, tamano // 50))
+        salida.append(lote)
+    return salida
+
+
+def huellas_estables(n: int, rnd: random.Random) -> int:
+    """
+    Diferencias entre lo esperado y lo obtenido al traducir y fundir n fichas de Autocor
+    descargadas dos días seguidos sin cambios (con las claves en orden inverso), salvo un
+    precio cada diez.
+    """
+    traductor = AutocorRecordTranslator()
+    hoy = [entidad_autocor(i, rnd) for i in range(n)]
+    manana = [{**e, "days_in_stock": e["days_in_stock"] + 1, "processedAt": "2025-06-02T03:00:12.646Z"}
+              for e in hoy]
+    for e in manana[::10]:
+        e["prices"] += 500
+    manana = [dict(reversed(list(e.items()))) for e in manana]
+    filas_hoy = [traductor.build_csv_row(e) for e in hoy]
+    filas_manana = [traductor.build_csv_row(e) for e in manana]
+    fallas = sum((a["hash_contenido"] == b["hash_contenido"]) != (i % 10 != 0)
+                 for i, (a, b) in enumerate(zip(filas_hoy, filas_manana)))
+    # Sin vigencia: cada fila con el mismo hash es refreshed, nunca updated
+    existentes = {str(f["id_record"]): f for f in filas_hoy}
+    _, m, _ = MergeService(ByDaysFreshnessPolicy(fresh_days=0)).merge_with_changes(existentes, filas_manana)
+    fallas += abs(m["updated"] - len(manana[::10])) + abs(m["refreshed"] - (n - len(manana[::10])))
+    return fallas
+
+
+def _sin_fantasmas(filas: Filas) -> List[Tuple[str, Any]]:
+    # Las claves __NOID__ dependen de id(row); se comparan solo las filas
+    return sorted((("" if k.startswith("__NOID__") else k), repr(v)) for k, v in filas.items())
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--existentes", type=int, default=100_000)
+    ap.add_argument("--lotes", type=int, default=100)
+    ap.add_argument("--tamano-lote", type=int, default=50, help="Como --batch-size de App")
+    args = ap.parse_args()
+
+    rnd = random.Random(21)
+    base = dataset(args.existentes, rnd)
+    entrantes = lotes(args.existentes, args.lotes, args.tamano_lote, rnd)
+    policy = ByDaysFreshnessPolicy(fresh_days=10)
+
+    t0 = time.perf_counter()
+    anterior, metricas_anterior = dict(base), []
+    for lote in entrantes:
+        anterior, m = merge_anterior(policy, anterior, lote)
+        metricas_anterior.append(m)
+    t_anterior = time.perf_counter() - t0
+
+    merger = MergeService(policy)
+    actual = dict(base)
+    t0 = time.perf_counter()
+    indice = merger.indexar(actual)
+    t_indice = time.perf_counter() - t0
+    metricas_actual = []
+    t0 = time.perf_counter()
+    for lote in entrantes:
+        actual, m, _ = merger.merge_with_changes(actual, lote, indice=indice, en_sitio=True)
+        metricas_actual.append(m)
+    t_actual = time.perf_counter() - t0
+
+    # Sin hash_contenido en las filas no hay "refreshed": se comparan las claves de antes
+    fallas = sum(a != {k: b[k] for k in a} or b["refreshed"] for a, b in zip(metricas_anterior, metricas_actual))
+    fallas += _sin_fantasmas(anterior) != _sin_fantasmas(actual)
+    filas = args.lotes * args.tamano_lote
+    print(f"{args.existentes} existentes × {args.lotes} lotes de ~{args.tamano_lote} filas")
+    print(f"anterior (copia + parseo por lote): {t_anterior:7.2f}s  {filas / t_anterior:9.0f} filas/s")
+    print(f"actual   (en sitio + índice):       {t_actual:7.2f}s  {filas / t_actual:9.0f} filas/s"
+          f"  (+ índice al cargar {t_indice:.2f}s)")
+    print(f"speedup: {t_anterior / t_actual:.1f}x | diferencias: {fallas}")
+    inestables = huellas_estables(1000, rnd)
+    print(f"hash_contenido de Autocor entre dos días: {inestables} diferencias")
+    fallas += inestables
+    sys.exit(1 if fallas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Servidor local que imita a Autocor (listPilot) y a PatioTuerca (listados + fichas).
+
+    python -m paginas.Autoscraper.bench.servidor [--autocor 1000] [--patiotuerca 500] [--puerto 8800]
+
+- /api/listPilot?page=N (GET o POST): {"aditional_data": {"page_count": P}, "entitydata": [...]}
+- /usados/-/{autos,pesados}/-/-/-/<año>[?page=<base64(n-1)>]: listado con JSON-LD `Car`
+- /vehicle/<slug>/<id>: ficha con #summary y #technicalData
+Latencia fija por respuesta y una tasa de errores 503 configurables.
+"""
+from __future__ import annotations
+import argparse, base64, json, random, re, socket, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+from paginas.Autoscraper.dominio.modelo import ANIOS_OBJETIVO
+from paginas.Autoscraper.bench.sinteticos import entidad_autocor, ficha_aleatoria, html_ficha, html_listado
+
+_LISTADO = re.compile(r"^/usados/-/(autos|pesados)/-/-/-/(\d{4})$")
+_FICHA = re.compile(r"^/vehicle/[^/]+/(\d+)$")
+
+
+class ServidorSimulado:
+    """Catálogo sintético determinista servido por HTTP en 127.0.0.1 (hilo aparte)."""
+
+    def __init__(self, autocor: int = 0, patiotuerca: int = 0, por_pagina: int = 20,
+                 latencia: float = 0.0, errores: float = 0.0, semilla: int = 7,
+                 anios: List[int] | None = None, puerto: int = 0):
+        self.autocor = autocor
+        self.por_pagina = max(1, por_pagina)
+        self.latencia = latencia
+        self.errores = errores
+        self.semilla = semilla
+        self.puerto = puerto
+        self.contadores: Dict[str, int] = {"api": 0, "listado": 0, "ficha": 0, "errores": 0}
+        self._rnd = random.Random(semilla)
+        self._lock = threading.Lock()
+        # HTML de cada ficha ya servida (el catálogo es determinista y acotado)
+        self._html_fichas: Dict[int, bytes] = {}
+        # PatioTuerca: la ficha k va a la unidad (año, base) k mod U
+        unidades = [(a, b) for a in (anios or ANIOS_OBJETIVO) for b in ("autos", "pesados")]
+        self._fichas: Dict[Tuple[int, str], List[int]] = {u: [] for u in unidades}
+        for k in range(patiotuerca):
+            self._fichas[unidades[k % len(unidades)]].append(4_000_000 + k)
+        self._server: ThreadingHTTPServer | None = None
+
+    # ---------- ciclo de vida ----------
+    def iniciar(self) -> "ServidorSimulado":
+        manejador = type("Manejador", (_Manejador,), {"sim": self})
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.puerto), manejador)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def detener(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "ServidorSimulado":
+        return self.iniciar()
+
+    def __exit__(self, *exc) -> None:
+        self.detener()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def url_autocor(self) -> str:
+        return f"{self.url}/api/listPilot"
+
+    @property
+    def bases_patiotuerca(self) -> List[str]:
+        return [f"{self.url}/usados/-/autos", f"{self.url}/usados/-/pesados"]
+
+    # ---------- contenido ----------
+    def pagina_autocor(self, page: int) -> bytes:
+        page_count = max(1, -(-self.autocor // self.por_pagina))
+        inicio = (page - 1) * self.por_pagina
+        fin = min(self.autocor, inicio + self.por_pagina)
+        entidades = [entidad_autocor(i, random.Random(self.semilla * 1_000_003 + i)) for i in range(inicio, fin)]
+        return json.dumps({"aditional_data": {"page_count": page_count}, "entitydata": entidades}).encode()
+
+    def listado(self, tipo: str, anio: int, pagina: int) -> bytes:
+        ids = self._fichas.get((anio, tipo), [])
+        ids = ids[(pagina - 1) * self.por_pagina: pagina * self.por_pagina]
+        return html_listado([f"{self.url}/vehicle/{tipo}-x-quito/{i}" for i in ids]).encode()
+
+    def ficha(self, vid: int) -> bytes:
+        html = self._html_fichas.get(vid)
+        if html is None:
+            summary, ficha = ficha_aleatoria(vid, random.Random(self.semilla * 1_000_003 + vid))
+            html = self._html_fichas[vid] = html_ficha(str(vid), summary, ficha).encode()
+        return html
+
+    def fallar(self) -> bool:
+        with self._lock:
+            return self.errores > 0 and self._rnd.random() < self.errores
+
+    def contar(self, clase: str) -> None:
+        with self._lock:
+            self.contadores[clase] += 1
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    sim: ServidorSimulado
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def setup(self) -> None:
+        super().setup()
+        # Cabeceras y cuerpo van en escrituras separadas: sin esto, el ACK retardado suma ~40 ms por respuesta
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _responder(self) -> None:
+        sim = self.sim
+        if self.command == "POST":
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if sim.latencia:
+            time.sleep(sim.latencia)
+        u = urlparse(self.path)
+        q = parse_qs(u.query)
+        if sim.fallar():
+            sim.contar("errores")
+            return self._enviar(503, b"", "text/plain")
+        if u.path.startswith("/api/listPilot"):
+            sim.contar("api")
+            return self._enviar(200, sim.pagina_autocor(int(q.get("page", ["1"])[0])), "application/json")
+        m = _LISTADO.match(u.path)
+        if m:
+            sim.contar("listado")
+            pagina = int(base64.b64decode(q["page"][0]).decode()) + 1 if "page" in q else 1
+            return self._enviar(200, sim.listado(m.group(1), int(m.group(2)), pagina), "text/html; charset=utf-8")
+        m = _FICHA.match(u.path)
+        if m:
+            sim.contar("ficha")
+            return self._enviar(200, sim.ficha(int(m.group(1))), "text/html; charset=utf-8")
+        self._enviar(404, b"", "text/plain")
+
+    def _enviar(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _responder
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--autocor", type=int, default=1000, help="Registros del catálogo de Autocor")
+    ap.add_argument("--patiotuerca", type=int, default=500, help="Fichas del catálogo de PatioTuerca")
+    ap.add_argument("--por-pagina", type=int, default=20)
+    ap.add_argument("--latencia", type=float, default=0.0, help="Segundos por respuesta")
+    ap.add_argument("--errores", type=float, default=0.0, help="Proporción de respuestas 503")
+    ap.add_argument("--puerto", type=int, default=8800)
+    args = ap.parse_args()
+    with ServidorSimulado(args.autocor, args.patiotuerca, args.por_pagina, args.latencia,
+                          args.errores, puerto=args.puerto) as sim:
+        print(f"Autocor:     --base-url {sim.url_autocor}")
+        print("PatioTuerca: " + " ".join(f"--listing-base {b}" for b in sim.bases_patiotuerca))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Páginas sintéticas de PatioTuerca y Autocor para los benchmarks (sin red)."""
+from __future__ import annotations
+from typing import Dict, Any, List, Iterator, Tuple
+import csv, html, json, os, random
+
+DATOS_PT = os.path.join("datos", "patiotuerca_fichas.csv")
+
+_MARCAS = [("Toyota", "Hilux"), ("Chevrolet", "Sail"), ("Kia", "Rio"), ("Hyundai", "Tucson"),
+           ("Mazda", "CX-5"), ("Nissan", "Sentra"), ("Ford", "Ranger"), ("Renault", "Duster")]
+_CIUDADES = ["Quito", "Guayaquil", "Cuenca", "Ambato", "Manta", "Loja"]
+
+
+def ficha_aleatoria(vid: int, rnd: random.Random) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """(summary, ficha_tecnica) con las mismas claves que publica PatioTuerca."""
+    marca, modelo = rnd.choice(_MARCAS)
+    anio = str(rnd.randint(2015, 2025))
+    summary = {
+        "Año": anio,
+        "Ciudad": rnd.choice(_CIUDADES),
+        "Recorrido": f"{rnd.randint(0, 250) * 1000:,} km".replace(",", "."),
+        "Precio": f"${rnd.randint(6, 80) * 500:,}".replace(",", "."),
+    }
+    ficha = {
+        "Marca": marca,
+        "Modelo": f"{modelo} {rnd.choice(['LX', 'GLS', 'SR5', 'Active'])}",
+        "Año": anio,
+        "Transmisión": rnd.choice(["Automática", "Manual"]),
+        "Motor(cilindraje)": f"{rnd.choice([1400, 1600, 2000, 2400, 2700])} cc",
+        "Combustible": rnd.choice(["Gasolina", "Diésel", "Híbrido"]),
+        "Tracción": rnd.choice(["4 x 2", "4 x 4"]),
+        "Dirección": rnd.choice(["Hidráulica", "Eléctrica", "Asistida"]),
+        "Tapizado": rnd.choice(["Tela", "Cuero"]),
+        "Tipo de pago": rnd.choice(["Negociable", "Contado"]),
+        "Subtipo": rnd.choice(["Sedán", "SUV", "Camioneta"]),
+    }
+    return summary, ficha
+
+
+def fichas_reales() -> List[Tuple[str, Dict[str, str], Dict[str, str]]]:
+    """(id, summary, ficha_tecnica) guardados en datos/patiotuerca_fichas.csv, si existe."""
+    if not os.path.exists(DATOS_PT):
+        return []
+    out = []
+    with open(DATOS_PT, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                rec = json.loads(row.get("json") or "{}")
+            except ValueError:
+                continue
+            out.append((row["id_record"], rec.get("summary") or {}, rec.get("ficha_tecnica") or {}))
+    return out
+
+
+def html_ficha(vid: str, summary: Dict[str, str], ficha: Dict[str, str], relleno: int = 40) -> str:
+    """Página de detalle con #summary, #technicalData y ruido alrededor (scripts, tarjetas, comentarios)."""
+    e = html.escape
+    cols = "".join(
+        f'<div class="col col-6 text-center"><small class="t">{e(k)}</small>\n  <b>{e(v)}</b> <!-- nota --></div>'
+        for k, v in summary.items()
+    )
+    filas = "".join(
+        f'<p class="m-none"><small>{e(k)}</small> <span>{e(v)}</span></p>\n' for k, v in ficha.items()
+    )
+    tarjetas = "".join(
+        f'<div class="card"><a href="/vehicle/x/{i}">Vehículo {i} &amp; más</a>'
+        f'<script>window.x{i}={{"a":{i}}};</script><img src="/img/{i}.jpg"></div>'
+        for i in range(relleno)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Ficha</title>"
+        f'<meta charset="utf-8"><meta itemprop="productID" content="{e(vid)}">'
+        "<style>.col{display:block}</style><script>var dataLayer=[];</script></head><body>"
+        f'<nav><section id="menu"><a href="/">Inicio</a></section></nav>{tarjetas}'
+        f'<section id="summary"><div class="row">{cols}</div></section>'
+        f'<section id="technicalData"><h2>Ficha técnica</h2>{filas}</section>'
+        f"<footer>{tarjetas}</footer></body></html>"
+    )
+
+
+def paginas_ficha(n: int, semilla: int = 7) -> Iterator[Tuple[str, str]]:
+    """(url, html) de n fichas: primero las de datos/ y luego sintéticas."""
+    rnd = random.Random(semilla)
+    reales = fichas_reales()
+    for i in range(n):
+        if i < len(reales):
+            vid, summary, ficha = reales[i]
+        else:
+            vid = str(2_000_000 + i)
+            summary, ficha = ficha_aleatoria(i, rnd)
+        url = f"https://ecuador.patiotuerca.com/vehicle/autos-x-quito/{vid}"
+        yield url, html_ficha(vid, summary, ficha)
+
+
+def paginas_borde() -> List[Tuple[str, str]]:
+    """(url, html) con marcado que se ve en fichas reales y en el que los motores pueden divergir."""
+    base = "https://ecuador.patiotuerca.com/vehicle/autos-x-quito/"
+    casos = [
+        # <div> dentro de <p>: html.parser lo anida (otros parsers cierran el <p> antes)
+        '<section id="technicalData"><p class="m-none"><small>Marca</small><div><span>Kia</span></div></p>'
+        '<p class="m-none"><small>Modelo</small> <span>Rio</span></p></section>',
+        # Valores dentro de CDATA
+        '<section id="summary"><div class="row"><div class="col"><small>Año</small><b><![CDATA[2019]]></b>'
+        '</div></div></section><section id="technicalData"><p class="m-none"><small>Modelo</small>'
+        '<span><![CDATA[Rio LX]]></span></p></section>',
+        # Sin secciones de ficha
+        "<p>Anuncio no disponible</p>",
+    ]
+    return [(f"{base}{1_000 + i}", f"<!DOCTYPE html><html><head><title>Ficha</title></head><body>{c}</body></html>")
+            for i, c in enumerate(casos)]
+
+
+def html_listado(urls: List[str], relleno: int = 60) -> str:
+    """Página de resultados: tarjetas, scripts varios y el JSON-LD con un `Car` por anuncio."""
+    e = html.escape
+    cars = [{"@context": "https://schema.org", "@type": "Car", "name": f"Auto {i}", "url": u,
+             "offers": {"@type": "Offer", "price": 10000 + i, "priceCurrency": "USD"}}
+            for i, u in enumerate(urls)]
+    migas = {"@context": "https://schema.org", "@type": "BreadcrumbList",
+             "itemListElement": [{"@type": "ListItem", "position": 1, "name": "Usados"}]}
+    tarjetas = "".join(
+        f'<div class="card"><a href="{e(u)}">Anuncio {i}</a><img src="/img/{i}.jpg">'
+        f'<script>window.c{i}={{"i":{i}}};</script></div>'
+        for i, u in enumerate(urls)
+    )
+    ruido = "".join(f'<div class="ad"><span>Publicidad {i}</span><!-- slot {i} --></div>' for i in range(relleno))
+    return (
+        "<!DOCTYPE html><html><head><title>Usados</title><meta charset=\"utf-8\">"
+        f'<script type="application/ld+json">{json.dumps(migas)}</script>'
+        "<script>var dataLayer=[];</script></head><body>"
+        f"{ruido}{tarjetas}"
+        f'<script type="application/ld+json">\n{json.dumps(cars, ensure_ascii=False, indent=1)}\n</script>'
+        f"{ruido}</body></html>"
+    )
+
+
+def paginas_listado(n: int, por_pagina: int = 24) -> Iterator[Tuple[str, str]]:
+    """(url, html) de n páginas de resultados con `por_pagina` anuncios cada una."""
+    for p in range(n):
+        urls = [f"https://ecuador.patiotuerca.com/vehicle/autos-x-quito/{3_000_000 + p * por_pagina + i}"
+                for i in range(por_pagina)]
+        yield f"https://ecuador.patiotuerca.com/usados/-/autos/-/-/-/2024?page={p}", html_listado(urls)
+
+
+_VERSIONES = ["1.4 TA", "1.6 TM", "2.0 4X2 TA", "2.4 4X4 TM", "1.5 CVT AC", "2.7 TA"]
+
+
+def entidad_autocor(i: int, rnd: random.Random) -> Dict[str, Any]:
+    """Registro con la forma de `entitydata` de listPilot (las claves que mapea AutocorRecordTranslator)."""
+    marca, modelo = rnd.choice(_MARCAS)
+    return {
+        "id_record": 500_000 + i,
+        "id": f"AC{500_000 + i}",
+        "brand": marca.upper(),
+        "model": modelo.upper(),
+        "version": f"{modelo.upper()} {rnd.choice(_VERSIONES)}",
+        "year": rnd.randint(2012, 2025),
+        "prices": rnd.randint(8, 60) * 500,
+        "purchase_price": rnd.randint(6, 50) * 500,
+        "odometer": str(rnd.randint(0, 200) * 1000),
+        "color": rnd.choice(["BLANCO", "NEGRO", "PLATA", "ROJO"]),
+        "fuel_name": rnd.choice(["GASOLINA", "DIESEL"]),
+        "type": rnd.choice(["SEDAN", "SUV", "CAMIONETA"]),
+        "location": rnd.choice(_CIUDADES).upper(),
+        "status_name": "DISPONIBLE",
+        "availability_status_name": rnd.choice(["DISPONIBLE", "RESERVADO"]),
+        "availability_status_code": "D",
+        "saving_plan_order": rnd.choice(["", "AUTOMATICA", "MANUAL"]),
+        "license_plate": f"P{rnd.randint(100, 999)}{rnd.randint(1000, 9999)}",
+        "days_in_stock": rnd.randint(0, 120),
+        "published_in_web": True,
+        "media": [{"url": f"https://img.example/{i}/{k}.jpg"} for k in range(3)],
+        "created_dt": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T10:00:00.000Z",
+        "processedAt": "2025-06-01T00:00:00Z",
+    }
@@ -1,7 +1,7 @@
 # autocor_solid/domain/models.py
 from __future__ import annotations
 from typing import Optional
-import datetime
+import datetime, hashlib, math
 #-Patiotuerca
 from dataclasses import dataclass
 from typing import Dict, Any
@@ -24,6 +24,15 @@ def parse_iso_dt(s: Optional[str]) -> Optional[datetime.datetime]:
 def now_utc():
     return datetime.datetime.now(datetime.timezone.utc)
 
+def epoch_iso(s: Optional[str]) -> float:
+    """parse_iso_dt en segundos epoch; NaN si no hay fecha legible."""
+    dt = parse_iso_dt(s)
+    return dt.timestamp() if dt else math.nan
+
+def hash_contenido(texto: str) -> str:
+    """Huella estable del contenido de una ficha (su JSON canónico): 32 hex de blake2b."""
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=16).hexdigest()
+
 
 
 
@@ -55,5 +64,6 @@ CSV_COLS = [ #Modificado al formato de datos completo pedido por el cliente (Com
     "descripcion",
     "fecha_ingreso",
     "url",
+    "hash_contenido",
     "json"
 ]
@@ -1,15 +1,26 @@
 # autocor_solid/domain/policies.py
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Protocol, Dict
+from typing import Protocol, Dict, List, Sequence
 import datetime
 from .modelo import parse_iso_dt
 
 class FreshnessPolicy(Protocol):
+    date_field: str
+
     def is_fresh(self, old_row: Dict[str, str], reference: datetime.datetime) -> bool:
         """Retorna True si la fila existente está vigente."""
         ...
 
+    def vigentes(self, instantes: Sequence[float], reference: datetime.datetime) -> List[bool]:
+        """Vigencia de cada instante (epoch s, NaN = sin fecha)."""
+        ...
+
+def _dentro_de(instantes: Sequence[float], reference: datetime.datetime, ventana: datetime.timedelta) -> List[bool]:
+    # Mismo criterio que (reference - dt) < ventana; NaN compara False (sin fecha → no vigente)
+    ref, limite = reference.timestamp(), ventana.total_seconds()
+    return [ref - t < limite for t in instantes]
+
 @dataclass(frozen=True)
 class ByDaysFreshnessPolicy(FreshnessPolicy):
     fresh_days: int
@@ -23,6 +34,11 @@ class ByDaysFreshnessPolicy(FreshnessPolicy):
             return False
         return (reference - dt) < datetime.timedelta(days=self.fresh_days)
 
+    def vigentes(self, instantes: Sequence[float], reference: datetime.datetime) -> List[bool]:
+        if self.fresh_days <= 0:
+            return [False] * len(instantes)
+        return _dentro_de(instantes, reference, datetime.timedelta(days=self.fresh_days))
+
 # (Ejemplo alternativo, si un día lo quieres)
 @dataclass(frozen=True)
 class ByHoursFreshnessPolicy(FreshnessPolicy):
@@ -36,3 +52,8 @@ class ByHoursFreshnessPolicy(FreshnessPolicy):
         if not dt:
             return False
         return (reference - dt) < datetime.timedelta(hours=self.hours)
+
+    def vigentes(self, instantes: Sequence[float], reference: datetime.datetime) -> List[bool]:
+        if self.hours <= 0:
+            return [False] * len(instantes)
+        return _dentro_de(instantes, reference, datetime.timedelta(hours=self.hours))
@@ -1,45 +1,182 @@
 # autocor_solid/domain/services.py
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Any, Iterable, Tuple, List
+from typing import Callable, Dict, Any, Iterable, Optional, Set, Tuple, List
+import datetime
 from .politicas import FreshnessPolicy
-from .modelo import now_utc
+from .modelo import now_utc, epoch_iso
 
 # patioTuerca_solid/domain/services.py
 
+# Resultados posibles de una fila existente o entrante en el merge (claves de las métricas):
+# kept = vigente sin cambios, updated = contenido distinto, refreshed = vencida pero idéntica,
+# added = nueva
+RESULTADOS = ("kept", "updated", "refreshed", "added")
+HASH_FIELD = "hash_contenido"
+
+class IndiceFrescura:
+    """
+    Instante (epoch s) de la fecha de vigencia de cada fila, por id. Se arma una vez al cargar
+    el dataset, así la vigencia es una comparación numérica en vez de volver a parsear la
+    fecha ISO de cada fila existente en cada lote. Las filas que el merge reemplaza se
+    olvidan y se vuelven a calcular (una vez) la próxima vez que se consultan.
+    """
+
+    def __init__(self, date_field: str):
+        self.date_field = date_field
+        self._instantes: Dict[str, float] = {}
+
+    @classmethod
+    def desde(cls, filas: Dict[str, Dict[str, Any]], date_field: str) -> "IndiceFrescura":
+        indice = cls(date_field)
+        # Las fechas se repiten mucho (una por segundo de crawl): se parsea cada texto distinto una vez
+        por_texto: Dict[Any, float] = {}
+        instantes = indice._instantes
+        for k, r in filas.items():
+            s = r.get(date_field)
+            try:
+                ts = por_texto[s]
+            except KeyError:
+                ts = por_texto[s] = epoch_iso(s)
+            except TypeError:  # valor no hasheable: sin memo
+                ts = epoch_iso(s)
+            instantes[k] = ts
+        return indice
+
+    def olvidar(self, key: str) -> None:
+        self._instantes.pop(key, None)
+
+    def instantes(self, keys: List[str], filas: Dict[str, Dict[str, Any]]) -> List[float]:
+        """Instantes de `keys`; los que falten se calculan desde `filas` y quedan indexados."""
+        ts = self._instantes
+        salida = []
+        for k in keys:
+            t = ts.get(k)
+            if t is None:
+                t = ts[k] = epoch_iso(filas[k].get(self.date_field))
+            salida.append(t)
+        return salida
+
+    def __len__(self) -> int:
+        return len(self._instantes)
+
+
+# (fila anterior o None si es nueva, fila nueva) de cada ficha cuyo contenido cambió en el lote
+Cambios = List[Tuple[Optional[Dict[str, Any]], Dict[str, Any]]]
+
+
 @dataclass
 class MergeService:
     freshness: FreshnessPolicy
+    # Observador opcional: recibe los cambios de cada merge (p. ej. infraestructura.historial)
+    on_change: Optional[Callable[[Cambios], None]] = None
 
     def merge(
         self,
         existing: Dict[str, Dict[str, str]],
         incoming_rows: Iterable[Dict[str, Any]],
-        id_field: str = "id_record"
+        id_field: str = "id_record",
+        indice: Optional[IndiceFrescura] = None,
+        en_sitio: bool = False,
     ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int]]:
         """Funde datasets aplicando FreshnessPolicy; devuelve (merged, métricas)."""
+        merged, metrics, _ = self.merge_with_changes(existing, incoming_rows, id_field, indice, en_sitio)
+        return merged, metrics
+
+    def indexar(self, existing: Dict[str, Dict[str, Any]]) -> IndiceFrescura:
+        """Índice de vigencia para `existing`, para pasarlo a merge_with_changes() lote tras lote."""
+        return IndiceFrescura.desde(existing, getattr(self.freshness, "date_field", "fecha_ingreso"))
+
+    def vigentes(
+        self,
+        existing: Dict[str, Dict[str, Any]],
+        keys: List[str],
+        indice: Optional[IndiceFrescura] = None,
+        reference: Optional[datetime.datetime] = None,
+    ) -> Set[str]:
+        """Cuáles de `keys` (todas presentes en `existing`) siguen vigentes según la policy."""
+        if not keys:
+            return set()
+        ref = reference or now_utc()
+        if not hasattr(self.freshness, "vigentes"):
+            return {k for k in keys if self.freshness.is_fresh(existing[k], ref)}
+        if indice is None:
+            indice = IndiceFrescura(getattr(self.freshness, "date_field", "fecha_ingreso"))
+        mascara = self.freshness.vigentes(indice.instantes(keys, existing), ref)
+        return {k for k, ok in zip(keys, mascara) if ok}
+
+    def merge_with_changes(
+        self,
+        existing: Dict[str, Dict[str, str]],
+        incoming_rows: Iterable[Dict[str, Any]],
+        id_field: str = "id_record",
+        indice: Optional[IndiceFrescura] = None,
+        en_sitio: bool = False,
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int], List[Dict[str, Any]]]:
+        """
+        Como merge(), pero además devuelve las filas nuevas o actualizadas (las que hay que persistir).
+        `en_sitio`: actualiza `existing` en vez de copiarlo (el llamador lo reemplaza por el resultado).
+        `indice`: vigencia precalculada de `existing` (ver indexar()); olvida las filas que cambian.
+
+        Si ambas filas traen hash_contenido, el contenido decide antes que la edad: un hash
+        distinto es `updated` aunque la fila siga vigente, y uno igual en una fila vencida es
+        `refreshed`: se conserva la fila guardada (su json y su hash, sin reescribirlos) y solo
+        se adelanta su fecha de vigencia, que se persiste únicamente si cambió.
+        Filas sin hash (guardadas antes de la columna): solo por edad, como siempre.
+        """
         ref = now_utc()
-        merged = dict(existing)
-        kept = updated = added = 0
+        merged = existing if en_sitio else dict(existing)
+        changed: List[Dict[str, Any]] = []
+        kept = updated = refreshed = added = 0
+        cambios: Cambios = []
+        date_field = getattr(self.freshness, "date_field", "fecha_ingreso")
+
+        filas = [(str(row.get(id_field, "")).strip(), row) for row in incoming_rows]
+        # Vigencia de todo el lote de una vez, sobre las filas como estaban antes del merge
+        previas = list({key for key, _ in filas if key and key in existing})
+        frescas = self.vigentes(existing, previas, indice, ref)
+        antes = {key: existing[key] for key in previas}
 
-        for row in incoming_rows:
-            key = str(row.get(id_field, "")).strip()
+        for key, row in filas:
             if not key:
                 # Sin id: no aplica policy; igual se incorpora
                 phantom_key = f"__NOID__{id(row)}"
                 merged[phantom_key] = row
+                changed.append(row)
                 added += 1
                 continue
 
-            if key in existing:
-                if self.freshness.is_fresh(existing[key], ref):
+            if key in antes:
+                viejo = antes[key]
+                mismo = _mismo_contenido(viejo, row)
+                if mismo is not False and key in frescas:
                     kept += 1
+                    continue
+                if mismo:
+                    refreshed += 1
+                    if viejo.get(date_field) == row.get(date_field):
+                        continue
+                    row = {**viejo, date_field: row.get(date_field)}
                 else:
-                    merged[key] = row
                     updated += 1
+                    cambios.append((viejo, row))
             else:
-                merged[key] = row
                 added += 1
+                cambios.append((None, row))
+            merged[key] = row
+            changed.append(row)
+            if indice is not None:
+                indice.olvidar(key)
 
-        metrics = {"kept": kept, "updated": updated, "added": added, "total": len(merged)}
-        return merged, metrics
+        if cambios and self.on_change is not None:
+            self.on_change(cambios)
+        metrics = {"kept": kept, "updated": updated, "refreshed": refreshed, "added": added, "total": len(merged)}
+        return merged, metrics, changed
+
+
+def _mismo_contenido(viejo: Dict[str, Any], nuevo: Dict[str, Any]) -> Optional[bool]:
+    """True/False según hash_contenido; None si alguna de las dos filas no lo tiene."""
+    a, b = viejo.get(HASH_FIELD), nuevo.get(HASH_FIELD)
+    if not a or not b:
+        return None
+    return a == b
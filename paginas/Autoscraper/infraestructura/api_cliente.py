@@ -1,7 +1,11 @@
 # autocor_solid/infra/api_client.py
 from __future__ import annotations
-from typing import Protocol, Tuple, List, Dict, Any, Optional
-import time, requests
+from typing import Protocol, Tuple, List, Dict, Any, Optional, Iterable, Iterator, Callable
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import json, requests
+from paginas.Autoscraper.infraestructura.cache_http import HttpCache
+from paginas.Autoscraper.infraestructura.ritmo import AimdPacer
+from paginas.Autoscraper.infraestructura.transporte import Transporte
 
 DEFAULT_BASE_URL = "https://www.autocor.com.ec/api/listPilot"
 
@@ -10,32 +14,61 @@ class ApiClient(Protocol):
     def fetch_page(self, page: int) -> List[Dict[str, Any]]: ...
 
 class RequestsApiClient(ApiClient):
-    def __init__(self, base_url: str, user_agent: str, timeout: int = 20, retries: int = 3):
+    def __init__(self, base_url: str, user_agent: str, timeout: int = 20, retries: int = 3,
+                 concurrency: int = 1, cache: Optional[HttpCache] = None,
+                 pacer: Optional[AimdPacer] = None, transporte: Optional[Transporte] = None):
         self.base_url = base_url
-        self.timeout = timeout
-        self.retries = retries
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": user_agent, "Accept": "application/json"})
+        self.cache = cache
+        self.pacer = pacer
+        self.concurrency = max(1, int(concurrency))
+        # Sesión, pool, reintentos y timeouts (conexión, lectura) compartidos por todas las páginas
+        self.transporte = transporte or Transporte(user_agent, concurrency=self.concurrency, retries=retries,
+                                                   read_timeout=timeout, fuente="autocor",
+                                                   accept="application/json")
+        self.session = self.transporte.session
         self._method: Optional[str] = None  # "GET" o "POST"
+        self.page_count: Optional[int] = None
+        self._stop: Optional[Callable[[List[Dict[str, Any]]], bool]] = None
+        self.stopped_at: Optional[int] = None
+
+    def set_stop_filter(self, conocida: Optional[Callable[[List[Dict[str, Any]]], bool]]) -> None:
+        """
+        Sincronización incremental: la primera página para la que `conocida(entidades)` es True
+        es la última que se pide (las siguientes ya están guardadas). None recorre todo.
+        Olvida el corte de una corrida anterior con el mismo cliente.
+        """
+        self._stop = conocida
+        self.stopped_at = None
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        return self.transporte.request(method, url, self.pacer, **kwargs)
 
     def _fetch_page(self, page: int, method: str) -> Dict[str, Any]:
         params = {"page": page}
+        if self.cache is not None:
+            url = f"{self.base_url}?page={page}"
+            kwargs = {"data": {}} if method == "POST" else {}
+            return json.loads(self.cache.fetch(self._send, method, url, **kwargs))
         if method == "GET":
-            resp = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            resp = self._send("GET", self.base_url, params=params)
         else:
             url = f"{self.base_url}?page={page}"
-            resp = self.session.post(url, data={}, timeout=self.timeout)
+            resp = self._send("POST", url, data={})
         resp.raise_for_status()
         return resp.json()
 
     def discover_first_page(self) -> Tuple[int, List[Dict[str, Any]]]:
+        """Página 1 y page_count; prueba primero el método que funcionó la última vez."""
         last_err = None
-        for m in ("GET", "POST"):
+        recordado = self.transporte.recordado("metodo")
+        for m in sorted(("GET", "POST"), key=lambda x: x != recordado):
             try:
                 data = self._fetch_page(1, m)
                 self._method = m
+                self.transporte.recordar("metodo", m)
                 page_count = int(data.get("aditional_data", {}).get("page_count", 1))
                 entities = list(data.get("entitydata", []) or [])
+                self.page_count = page_count
                 return page_count, entities
             except Exception as e:
                 last_err = e
@@ -45,11 +78,84 @@ class RequestsApiClient(ApiClient):
         if not self._method:
             self.discover_first_page()
         assert self._method is not None
-        for attempt in range(1, self.retries + 1):
+        # Los reintentos (429/5xx, timeouts, conexión) los hace el transporte
+        data = self._fetch_page(page, self._method)
+        return list(data.get("entitydata", []) or [])
+
+    def fetch_pages(self, pages: Iterable[int]) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Descarga varias páginas en paralelo (máximo `concurrency` en vuelo) y las
+        entrega según van llegando, no en orden. Cada página conserva sus reintentos.
+        `pages` debe ser creciente: con set_stop_filter(), al llegar una página conocida no
+        se piden las posteriores y las que estén en vuelo se descartan.
+        """
+        if not self._method:
+            self.discover_first_page()
+
+        pending_pages = iter(pages)
+        if self.concurrency <= 1:
+            for p in pending_pages:
+                entities = self.fetch_page(p)
+                yield p, entities
+                if self._is_stop_page(p, entities):
+                    return
+            return
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            in_flight = {}
+            for p in pending_pages:
+                in_flight[pool.submit(self.fetch_page, p)] = p
+                if len(in_flight) >= self.concurrency:
+                    break
             try:
-                data = self._fetch_page(page, self._method)
-                return list(data.get("entitydata", []) or [])
-            except Exception:
-                if attempt >= self.retries:
-                    raise
-                time.sleep(1.2 * attempt)
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for fut in sorted(done, key=in_flight.get):
+                        p = in_flight.pop(fut)
+                        if self.stopped_at is not None and p > self.stopped_at:
+                            continue
+                        entities = fut.result()
+                        if self._is_stop_page(p, entities):
+                            for f in [f for f, q in in_flight.items() if q > p]:
+                                f.cancel()
+                                del in_flight[f]
+                        elif self.stopped_at is None:
+                            nxt = next(pending_pages, None)
+                            if nxt is not None:
+                                in_flight[pool.submit(self.fetch_page, nxt)] = nxt
+                        yield p, entities
+            finally:
+                for fut in in_flight:
+                    fut.cancel()
+
+    def close(self) -> None:
+        self.transporte.close()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        if self.cache is not None:
+            stats["cache http"] = self.cache.stats()
+        if self.pacer is not None:
+            stats["ritmo"] = self.pacer.snapshot()
+        return stats
+
+    def iter_pages(self, skip: Iterable[int] = ()) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Recorre el catálogo completo: página 1 y luego 2..page_count en paralelo.
+        Las páginas de `skip` (ya hechas) no se descargan; la 1 siempre se lee porque trae page_count.
+        """
+        skip = set(skip)
+        self.stopped_at = None
+        page_count, entities = self.discover_first_page()
+        if 1 not in skip:
+            yield 1, entities
+        if self._is_stop_page(1, entities):
+            return
+        yield from self.fetch_pages(p for p in range(2, page_count + 1) if p not in skip)
+
+    def _is_stop_page(self, page: int, entities: List[Dict[str, Any]]) -> bool:
+        """True (y anota la página) si es la primera conocida según set_stop_filter()."""
+        if self._stop is None or not self._stop(entities):
+            return False
+        self.stopped_at = page if self.stopped_at is None else min(self.stopped_at, page)
+        return True
@@ -1,10 +1,21 @@
 from __future__ import annotations
-from typing import Protocol, Dict, Any, List
-from bs4 import BeautifulSoup
+from typing import Protocol, Dict, Any, List, Iterator, Callable, Optional, Deque, Set, Tuple
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer
 from paginas.Autoscraper.dominio.modelo import Vehiculo
+from paginas.Autoscraper.infraestructura.cache_http import HttpCache
+from paginas.Autoscraper.infraestructura.checkpoint import CrawlCheckpoint
+from paginas.Autoscraper.infraestructura.frontera import UrlFrontier
+from paginas.Autoscraper.infraestructura.metricas import METRICAS
+from paginas.Autoscraper.infraestructura.registro import Progreso
+from paginas.Autoscraper.infraestructura.ritmo import AimdPacer
+from paginas.Autoscraper.infraestructura.transporte import Transporte
 import requests
 import re
-import time, base64, json
+import logging, time, base64, json
+
+log = logging.getLogger(__name__)
 
 URL_BASE = ["https://ecuador.patiotuerca.com/usados/-/autos",
             "https://ecuador.patiotuerca.com/usados/-/pesados"]
@@ -14,15 +25,36 @@ class WebClient(Protocol):
     def fetch_html(self, url: str) -> str: ...
  
 class RequestsWebClient(WebClient):
-    def __init__(self, user_agent: str, timeout: int = 15):
-        self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": user_agent})
+    def __init__(self, user_agent: str, timeout: int = 15, cache: Optional[HttpCache] = None,
+                 pacer: Optional[AimdPacer] = None, concurrency: int = 1, retries: int = 3,
+                 transporte: Optional[Transporte] = None):
+        self.cache = cache
+        self.pacer = pacer
+        # Antes sin reintentos: un error de listado cortaba el año entero
+        self.transporte = transporte or Transporte(user_agent, concurrency=concurrency, retries=retries,
+                                                   read_timeout=timeout, fuente="patiotuerca")
+        self.session = self.transporte.session
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        return self.transporte.request(method, url, self.pacer, **kwargs)
  
     def fetch_html(self, url: str) -> str:
-        resp = self.session.get(url, timeout=self.timeout)
+        if self.cache is not None:
+            return self.cache.fetch(self._send, "GET", url)
+        resp = self._send("GET", url)
         resp.raise_for_status()
         return resp.text
+
+    def close(self) -> None:
+        self.transporte.close()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        if self.cache is not None:
+            stats["cache http"] = self.cache.stats()
+        if self.pacer is not None:
+            stats["ritmo"] = self.pacer.snapshot()
+        return stats
  
 #---------------------------Extracción de las urls para sacar data---------------------------
 def generar_codigo_base64(n: int) -> str:
@@ -30,6 +62,56 @@ def generar_codigo_base64(n: int) -> str:
     return base64.b64encode(str(n).encode()).decode()
  
  
+def _urls_car(data: Any) -> Iterator[str]:
+    # Algunos scripts tienen una lista de objetos, otros un dict
+    if isinstance(data, list):
+        for item in data:
+            if item.get("@type") == "Car" and "url" in item:
+                yield item["url"]
+    elif isinstance(data, dict):
+        if data.get("@type") == "Car" and "url" in data:
+            yield data["url"]
+
+
+def extraer_urls_jsonld_dom(html: str) -> List[str]:
+    """Versión con árbol DOM completo (BeautifulSoup); respaldo del escáner."""
+    soup = BeautifulSoup(html, "html.parser")
+    urls = []
+    for script in soup.find_all("script", {"type": "application/ld+json"}):
+        try:
+            for url in _urls_car(json.loads(script.string)):
+                urls.append(url)
+        except Exception:
+            continue
+    return urls
+
+
+# <script type="application/ld+json">…</script>; el valor del type se compara
+# respetando mayúsculas, igual que BeautifulSoup
+_SCRIPT_JSONLD = re.compile(
+    r"""<script\b[^>]*?(?<![\w-])type\s*=\s*(["']?)(?-i:application/ld\+json)\1(?=[\s/>])[^>]*>(.*?)</script\s*>""",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def escanear_urls_jsonld(html: str) -> Iterator[str]:
+    """
+    Entrega las URLs de los objetos `Car` del JSON-LD sin construir el DOM:
+    localiza los <script type="application/ld+json"> con una regex y decodifica
+    cada bloque con json.loads. Si la página menciona JSON-LD pero no se
+    encuentra ningún bloque, recurre al parser completo.
+    """
+    encontrados = 0
+    for match in _SCRIPT_JSONLD.finditer(html):
+        encontrados += 1
+        try:
+            yield from _urls_car(json.loads(match.group(2)))
+        except Exception:
+            continue
+    if not encontrados and "application/ld+json" in html:
+        yield from extraer_urls_jsonld_dom(html)
+
+
 class PatioTuercaRepositorio():
     """Repositorio que obtiene vehículos por año desde PatioTuerca."""
  
@@ -38,82 +120,184 @@ class PatioTuercaRepositorio():
         self.web = web_client
         self.num_paginas = num_paginas
         self.pausa = pausa
+        # Predicado id → True si la ficha ya está guardada y vigente (no se descarga)
+        self.omitir: Optional[Callable[[str], bool]] = None
+        # Etapa de parseo en procesos aparte (None: se parsea en este mismo hilo)
+        self.parseo: Optional[PoolDeParseo] = None
+        # Avance persistido para --resume (None: sin checkpoint)
+        self.checkpoint: Optional[CrawlCheckpoint] = None
+        # Fichas ya vistas en la corrida, compartida entre años y urls base
+        self.frontera: Optional[UrlFrontier] = None
  
+    def _pausar(self, segundos: float) -> None:
+        # Con ritmo adaptativo el cliente web ya espera su turno antes de cada petición
+        if getattr(self.web, "pacer", None) is None:
+            METRICAS.inc("sleep_seconds_total", segundos, fuente="patiotuerca", origen="pausa")
+            time.sleep(segundos)
+
     def _extraer_urls_vehiculos(self, url_pagina: str) -> List[str]:
         """Extrae URLs de fichas de vehículos a partir del JSON-LD embebido en la página."""
         html = self.web.fetch_html(url_pagina)
-        soup = BeautifulSoup(html, "html.parser")
+        return list(escanear_urls_jsonld(html))
  
-        urls = []
-        for script in soup.find_all("script", {"type": "application/ld+json"}):
-            try:
-                data = json.loads(script.string)
-                # Algunos scripts tienen una lista de objetos, otros un dict
-                if isinstance(data, list):
-                    for item in data:
-                        if item.get("@type") == "Car" and "url" in item:
-                            urls.append(item["url"])
-                elif isinstance(data, dict):
-                    if data.get("@type") == "Car" and "url" in data:
-                        urls.append(data["url"])
-            except Exception:
+    def iter_vehiculos_por_anio(self, anio: int, bases: Optional[List[str]] = None) -> Iterator[Vehiculo]:
+        """
+        Recorre las páginas de resultados de un año y entrega cada ficha completa
+        en cuanto se descarga (página de listado → sus fichas → siguiente página).
+        `bases` limita el recorrido a algunas urls base (por defecto URL_BASE).
+        Con `parseo`, el HTML se entrega a los procesos de parseo y se sigue descargando;
+        como mucho `parseo.max_pendientes` fichas esperan parseo a la vez.
+        Con `checkpoint`, salta bases, páginas y fichas ya hechas y marca las nuevas.
+        """
+        cont = {"urls": 0, "extraidos": 0, "omitidos": 0, "hechos": 0, "duplicadas": 0}
+        cp = self.checkpoint
+        tope = self.parseo.max_pendientes if self.parseo is not None else 1
+        # FIFO de (url, futuro, clave de página); futuro None = marca de fin de página/base
+        pendientes: Deque[Tuple[str, Optional[Future], str]] = deque()
+        # Páginas y bases con alguna ficha fallida: no se marcan como hechas
+        fallidas: Set[str] = set()
+        self._progreso = Progreso(log, f"fichas extraídas del año {anio}")
+        try:
+            for i in bases or URL_BASE:
+                clave_base = f"{anio}|{i}"
+                if cp and cp.hecho("base", clave_base):
+                    log.info("⏭️ Año %s, url base %s: completada en una corrida anterior", anio, i)
+                    continue
+                log.info("🚗 Buscando vehículos del año %s de la url base: %s", anio, i)
+                base_url = f"{i}/-/-/-/{anio}"
+                completa = False
+
+                for pagina in range(1, self.num_paginas + 1):
+                    clave_pagina = f"{clave_base}|{pagina}"
+                    if cp and cp.hecho("pagina", clave_pagina):
+                        continue
+                    # Construye la URL de la página actual
+                    if pagina == 1:
+                        url_pagina = base_url
+                    else:
+                        codigo = generar_codigo_base64(pagina - 1)
+                        url_pagina = f"{base_url}?page={codigo}"
+
+                    log.debug("🔎 Página %s: %s", pagina, url_pagina)
+                    try:
+                        urls = self._extraer_urls_vehiculos(url_pagina)
+                        if not urls:
+                            log.info("⚠️ No hay más resultados para %s", anio)
+                            completa = True
+                            break
+                        log.debug("✅ %d URLs encontradas en página %s", len(urls), pagina)
+                        self._pausar(self.pausa)
+                    except Exception as e:
+                        log.warning("❌ Error en página %s (%s): %s", pagina, url_pagina, e)
+                        break
+                    if cp:
+                        cp.posicion = {"anio": anio, "base": i, "pagina": pagina}
+
+                    # Extrae las fichas completas de cada URL de esta página
+                    for url in urls:
+                        cont["urls"] += 1
+                        vid = FichaExtractor.id_desde_url(url)
+                        # Se reserva en la frontera y se confirma recién al entregar la ficha
+                        if self.frontera is not None and not self.frontera.reservar(vid or url):
+                            cont["duplicadas"] += 1
+                            continue
+                        if vid and self.omitir and self.omitir(vid):
+                            cont["omitidos"] += 1
+                            self._soltar(url, entregada=True)
+                            continue
+                        if cp and cp.hecho("url", url):
+                            cont["hechos"] += 1
+                            self._soltar(url, entregada=True)
+                            continue
+                        self._encolar_ficha(url, clave_pagina, pendientes)
+                        # Contrapresión: no se descarga más hasta entregar las más antiguas
+                        yield from self._entregar(pendientes, tope, cont, fallidas)
+
+                    if cp:
+                        pendientes.append(("pagina", None, clave_pagina))
+                        yield from self._entregar(pendientes, tope, cont, fallidas)
+
+                if cp and completa:
+                    pendientes.append(("base", None, clave_base))
+                    yield from self._entregar(pendientes, tope, cont, fallidas)
+
+            yield from self._entregar(pendientes, 0, cont, fallidas)
+        finally:
+            # Corte anticipado del consumidor: no parsear lo que ya no se va a leer
+            for url, fut, _ in pendientes:
+                if fut is not None:
+                    fut.cancel()
+                    self._soltar(url, entregada=False)
+
+        log.info("📊 Año %s: %d URLs encontradas | extraídos: %d | omitidos vigentes: %d | duplicados: %d%s",
+                 anio, cont["urls"], cont["extraidos"], cont["omitidos"], cont["duplicadas"],
+                 f" | ya hechos (checkpoint): {cont['hechos']}" if cp else "")
+
+    def _encolar_ficha(self, url: str, clave_pagina: str,
+                       pendientes: Deque[Tuple[str, Optional[Future], str]]) -> None:
+        """Descarga la ficha y la encola: parseada aquí mismo o en manos de los procesos de parseo."""
+        fut: Future
+        try:
+            html = self.web.fetch_html(url)
+            if self.parseo is not None:
+                fut = self.parseo.enviar(html, url)
+            else:
+                fut = Future()
+                fut.set_result(FichaExtractor.parsear_html(html, url))
+        except Exception as e:
+            fut = Future()
+            fut.set_exception(e)
+        else:
+            self._pausar(0.8)
+        pendientes.append((url, fut, clave_pagina))
+
+    def _entregar(self, pendientes: Deque[Tuple[str, Optional[Future], str]], tope: int,
+                  cont: Dict[str, int], fallidas: Set[str]) -> Iterator[Vehiculo]:
+        """Entrega en orden lo encolado hasta dejar menos de `tope` pendientes."""
+        while pendientes and len(pendientes) >= tope:
+            url, fut, clave = pendientes.popleft()
+            if fut is None:
+                # Fin de página/base: todo lo anterior ya fue entregado, así que el
+                # próximo confirmar() de App llega después de guardarlo
+                if clave not in fallidas:
+                    self.checkpoint.marcar(url, clave)
                 continue
- 
-        return urls
- 
-    def obtener_vehiculos_por_anio(self, anio: int) -> List[Vehiculo]:
+            vehiculo = self._recibir_parseo(url, fut)
+            self._soltar(url, entregada=vehiculo is not None)
+            if vehiculo is None:
+                fallidas.update((clave, clave.rsplit("|", 1)[0]))
+                continue
+            cont["extraidos"] += 1
+            log.debug("🔹 %d: %s OK", cont["extraidos"], vehiculo.id)
+            self._progreso.tick()
+            yield vehiculo
+
+    def _soltar(self, url: str, entregada: bool) -> None:
+        """Cierra la reserva de la ficha en la frontera: vista si se entregó, olvidada si falló."""
+        if self.frontera is None:
+            return
+        clave = FichaExtractor.clave_frontera(url)
+        if entregada:
+            self.frontera.confirmar(clave)
+        else:
+            self.frontera.liberar(clave)
+
+    @staticmethod
+    def _recibir_parseo(url: str, fut: Future) -> Vehiculo | None:
+        try:
+            return vehiculo_desde_ficha(fut.result())
+        except Exception as e:
+            log.warning("⚠️ Error al procesar %s: %s", url, e)
+            return None
+
+    def obtener_vehiculos_por_anio(self, anio: int, bases: Optional[List[str]] = None) -> List[Vehiculo]:
         """Recorre las páginas de resultados para un año específico y extrae las fichas completas."""
-        todas_urls = [] #almacenar todas las urls
-        for i in URL_BASE:
-            print(f"🚗 Buscando vehículos del año {anio} de la url base: {i}")
-            base_url = f"{i}/-/-/-/{anio}"
- 
-            for pagina in range(1, self.num_paginas + 1):
-                # Construye la URL de la página actual
-                if pagina == 1:
-                    url_pagina = base_url
-                else:
-                    codigo = generar_codigo_base64(pagina - 1)
-                    url_pagina = f"{base_url}?page={codigo}"
- 
-                print(f"🔎 Página {pagina}: {url_pagina}")
-                try:
-                    urls = self._extraer_urls_vehiculos(url_pagina)
-                    if not urls:
-                        print(f"⚠️ No hay más resultados para {anio}")
-                        break
-                    todas_urls.extend(urls)
-                    print(f"✅ {len(urls)} URLs encontradas en página {pagina}")
-                    time.sleep(self.pausa)
-                except Exception as e:
-                    print(f"❌ Error en página {pagina}: {e}")
-                    break
-        print("Total de vehículos encontrados: ",len(todas_urls))
- 
-        # Extrae las fichas completas de cada URL
-        vehiculos = []
-        for i, url in enumerate(todas_urls, start=1):
-            try:
-                html = self.web.fetch_html(url)
-                ficha = FichaExtractor.parsear_html(html, url)
-                if not ficha["id"]:
-                    continue
-                vehiculos.append(Vehiculo(
-                id=ficha["id"],
-                summary=ficha["summary"],
-                ficha_tecnica=ficha["ficha_tecnica"],
-                url = ficha["url"]
-                ))
-                print(f"   🔹 {i}/{len(todas_urls)}: {ficha['id']} OK")
-                time.sleep(0.8)
-            except Exception as e:
-                print(f"   ⚠️ Error al procesar {url}: {e}")
- 
-        print(f"📊 Total extraídos para {anio}: {len(vehiculos)} vehículos")
-        return vehiculos
+        return list(self.iter_vehiculos_por_anio(anio, bases))
 
 
 #--------------------Extracción de la Data------------------------
+_ID_EN_URL = re.compile(r"/(\d+)$")
+
 class FichaExtractor:
     @staticmethod
     def extraer_id(soup: BeautifulSoup, url: str) -> str | None:
@@ -121,9 +305,19 @@ class FichaExtractor:
         if meta_id and meta_id.get("content"):
             return meta_id["content"]
 
-        match = re.search(r"/(\d+)$", url)
+        return FichaExtractor.id_desde_url(url)
+
+    @staticmethod
+    def id_desde_url(url: str) -> str | None:
+        """El id del anuncio es el último segmento numérico de la URL de la ficha."""
+        match = _ID_EN_URL.search(url)
         return match.group(1) if match else None
 
+    @staticmethod
+    def clave_frontera(url: str) -> str:
+        """Clave de la ficha en la UrlFrontier: su id, o la URL si no trae uno."""
+        return FichaExtractor.id_desde_url(url) or url
+
     @staticmethod
     def extraer_summary(soup: BeautifulSoup) -> Dict[str, Any]:
         data = {}
@@ -154,9 +348,27 @@ class FichaExtractor:
                 data[nombre.get_text(strip=True)] = valor.get_text(strip=True)
         return data
 
+    # Motor de extracción: "strainer" (BeautifulSoup solo sobre <section>/<meta>) o "soup"
+    # (árbol completo, la referencia). Ambos usan html.parser: otro parser (lxml, html5lib)
+    # arma un árbol distinto ante <div> dentro de <p> o CDATA y no devuelve lo mismo.
+    motor: str = "strainer"
+
     @staticmethod
-    def parsear_html(html: str, url: str) -> Dict[str, Any]:
-        soup = BeautifulSoup(html, "html.parser")
+    def motor_activo(motor: str | None = None) -> str:
+        return motor or FichaExtractor.motor
+
+    @staticmethod
+    def parsear_html(html: str, url: str, motor: str | None = None) -> Dict[str, Any]:
+        motor = FichaExtractor.motor_activo(motor)
+        with METRICAS.medir("parse_seconds", fuente="patiotuerca", motor=motor):
+            return FichaExtractor._parsear(html, url, motor)
+
+    @staticmethod
+    def _parsear(html: str, url: str, motor: str) -> Dict[str, Any]:
+        if motor == "strainer":
+            soup = BeautifulSoup(html, "html.parser", parse_only=_SOLO_SECCIONES_FICHA)
+        else:
+            soup = BeautifulSoup(html, "html.parser")
 
         return {
             "id": FichaExtractor.extraer_id(soup, url),
@@ -164,33 +376,131 @@ class FichaExtractor:
             "ficha_tecnica": FichaExtractor.extraer_ficha_tecnica(soup),
             "url": url
         }
-    
+
+
+# Los tres extractores solo leen <section> (#summary, #technicalData) y <meta itemprop=productID>;
+# el resto de la página no necesita entrar al árbol.
+_SOLO_SECCIONES_FICHA = SoupStrainer(["section", "meta"])
+
+
+def vehiculo_desde_ficha(ficha: Dict[str, Any]) -> Vehiculo | None:
+    """Vehiculo a partir de la salida de parsear_html; None si la ficha no trae id."""
+    segundos = ficha.pop("_parse_s", None)
+    if segundos is not None:
+        # Parseada en un proceso hijo: su tiempo viaja con la ficha, no en el registro de ese proceso
+        METRICAS.observar("parse_seconds", segundos, fuente="patiotuerca", motor=ficha.pop("_motor", ""))
+    if not ficha["id"]:
+        return None
+    return Vehiculo(
+        id=ficha["id"],
+        summary=ficha["summary"],
+        ficha_tecnica=ficha["ficha_tecnica"],
+        url=ficha["url"],
+    )
+
+
+#--------------------------Parseo en procesos---------------------------
+def _parsear_en_proceso(html: str, url: str, motor: str) -> Dict[str, Any]:
+    # Se ejecuta en el proceso hijo; el motor llega resuelto porque
+    # FichaExtractor.motor del proceso padre no viaja con la tarea.
+    t0 = time.perf_counter()
+    ficha = FichaExtractor._parsear(html, url, motor)
+    ficha["_parse_s"] = time.perf_counter() - t0
+    ficha["_motor"] = motor
+    return ficha
+
+
+class PoolDeParseo:
+    """
+    Etapa de parseo sobre un ProcessPoolExecutor: las descargas entregan el HTML crudo
+    y los procesos devuelven solo el dict id/summary/ficha_tecnica/url, de modo que el
+    parseo (CPU) usa todos los núcleos y no frena la red.
+    `max_pendientes` es el tope de HTML esperando parseo que respetan los consumidores.
+    """
+
+    def __init__(self, workers: int, max_pendientes: int | None = None):
+        self.workers = max(1, int(workers))
+        self.max_pendientes = max(1, int(max_pendientes or 2 * self.workers))
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def enviar(self, html: str, url: str) -> Future:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool.submit(_parsear_en_proceso, html, url, FichaExtractor.motor_activo())
+
+    def cerrar(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
 #---------------------------------Adaptador-----------------------------
 class PatioTuercaClientAdapter:
-    """Adaptador que expone la misma interfaz de un ApiClient estándar."""
-    def __init__(self, web_client: RequestsWebClient, anios: list[int]):
-        self.repo = PatioTuercaRepositorio(web_client)
+    """
+    Adaptador que expone la misma interfaz de un ApiClient estándar.
+    Con `unidades` (pares año, url base; ver infraestructura/shards.py) recorre solo ese
+    subconjunto del trabajo, en lugar de todos los `anios` × URL_BASE.
+    """
+    def __init__(self, web_client: RequestsWebClient, anios: list[int], engine: str = "sync",
+                 concurrency: int = 4, rate_per_host: float = 1.25, parse_workers: int = 0,
+                 unidades: Optional[List[Tuple[int, str]]] = None,
+                 frontera: Optional[UrlFrontier] = None):
+        if engine == "async":
+            # Import diferido: crawler_async depende de este módulo
+            from paginas.Autoscraper.infraestructura.crawler_async import AsyncPatioTuercaCrawler
+            self.repo = AsyncPatioTuercaCrawler(web_client, concurrency=concurrency, rate_per_host=rate_per_host)
+        else:
+            self.repo = PatioTuercaRepositorio(web_client)
+        if parse_workers > 0:
+            self.repo.parseo = PoolDeParseo(parse_workers)
+        self.repo.frontera = frontera if frontera is not None else UrlFrontier()
         self.anios = anios
+        self._bases: Dict[int, List[str]] = {}
+        if unidades is not None:
+            for anio, base in unidades:
+                self._bases.setdefault(anio, []).append(base)
+            self.anios = [a for a in anios if a in self._bases]
 
-    def fetch_year(self, anio: int) -> List[Dict[str, Any]]:
-        """Devuelve las fichas de vehículos de un solo año."""
-        vehiculos = self.repo.obtener_vehiculos_por_anio(anio)
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = self.repo.web.stats() if hasattr(self.repo.web, "stats") else {}
+        stats["frontera"] = self.repo.frontera.stats()
+        return stats
+
+    def close(self) -> None:
+        """Detiene los procesos de parseo, si se usaron, persiste la frontera y cierra las conexiones."""
+        if self.repo.parseo is not None:
+            self.repo.parseo.cerrar()
+        self.repo.frontera.guardar()
+        if hasattr(self.repo.web, "close"):
+            self.repo.web.close()
+
+    def set_checkpoint(self, checkpoint: Optional[CrawlCheckpoint]) -> None:
+        """Avance persistido: se saltan bases, páginas y fichas ya guardadas."""
+        self.repo.checkpoint = checkpoint
 
-        entities: List[Dict[str, Any]] = []
-        for v in vehiculos:
-            entities.append({
+    def set_skip_filter(self, omitir: Optional[Callable[[str], bool]]) -> None:
+        """Permite saltar la descarga de fichas cuyo id ya está guardado y vigente."""
+        self.repo.omitir = omitir
+
+    def iter_year(self, anio: int) -> Iterator[Dict[str, Any]]:
+        """Entrega las fichas de un año una a una, según se van descargando."""
+        for v in self.repo.iter_vehiculos_por_anio(anio, self._bases.get(anio)):
+            yield {
                 "id_record": v.id,
                 "summary": v.summary,
                 "ficha_tecnica": v.ficha_tecnica,
                 "url": v.url
-            })
-        return entities
+            }
+
+    def fetch_year(self, anio: int) -> List[Dict[str, Any]]:
+        """Devuelve las fichas de vehículos de un solo año."""
+        return list(self.iter_year(anio))
 
     def fetch_all(self) -> List[Dict[str, Any]]:
         """Devuelve la lista de fichas de vehículos de todos los años indicados."""
         all_entities: List[Dict[str, Any]] = []
         for anio in self.anios:
-            vehiculos = self.repo.obtener_vehiculos_por_anio(anio)
+            vehiculos = self.repo.obtener_vehiculos_por_anio(anio, self._bases.get(anio))
             # Convertimos los Vehiculo (dataclasses o dicts) a diccionarios simples
             for v in vehiculos:
                 all_entities.append({
@@ -0,0 +1,24 @@
+from __future__ import annotations
+import os
+from typing import Union
+
+
+def escribir_atomico(path: str, contenido: Union[str, bytes]) -> None:
+    """
+    Reemplaza `path` por `contenido` sin dejar nunca un archivo a medias: escribe `<path>.tmp`,
+    lo baja a disco (fsync) y lo renombra encima con os.replace. Crea el directorio si falta.
+    Texto en UTF-8; bytes tal cual.
+    """
+    directorio = os.path.dirname(path)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    tmp = f"{path}.tmp"
+    if isinstance(contenido, bytes):
+        f = open(tmp, "wb")
+    else:
+        f = open(tmp, "w", encoding="utf-8")
+    with f:
+        f.write(contenido)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+import os, json, time, hashlib, threading
+from typing import Dict, Any, Optional, Callable
+import requests
+
+# TTL (segundos) por clase de URL
+DEFAULT_TTLS: Dict[str, int] = {
+    "listado": 60 * 60,       # páginas de resultados de PatioTuerca
+    "ficha": 12 * 60 * 60,    # fichas de detalle de PatioTuerca
+    "api": 10 * 60,           # API JSON de Autocor (listPilot)
+}
+
+def clasificar_url(url: str) -> str:
+    """Clase de URL usada para elegir el TTL: 'api', 'ficha' o 'listado'."""
+    if "/api/" in url:
+        return "api"
+    if "/vehicle/" in url:
+        return "ficha"
+    return "listado"
+
+
+class HttpCache:
+    """
+    Caché HTTP en disco compartida por los clientes web y API.
+    - Guarda el cuerpo de la respuesta junto a su ETag / Last-Modified.
+    - Dentro del TTL de su clase la respuesta se sirve sin ir a la red.
+    - Vencido el TTL se revalida con If-None-Match / If-Modified-Since; un 304 reutiliza el cuerpo.
+    - Tamaño máximo en disco con desalojo LRU (por último acceso).
+    """
+
+    def __init__(self, directory: str, ttls: Optional[Dict[str, int]] = None,
+                 max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.revalidated = self.evicted = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # clave → [bytes, último acceso]; se reconstruye desde disco al iniciar
+        self._index: Dict[str, list] = {}
+        for name in os.listdir(directory):
+            if name.endswith(".meta.json"):
+                key = name[: -len(".meta.json")]
+                body = self._body_path(key)
+                if os.path.exists(body):
+                    meta = os.path.join(directory, name)
+                    self._index[key] = [os.path.getsize(body), os.path.getmtime(meta)]
+        self._size = sum(v[0] for v in self._index.values())
+        self._evict_if_needed()  # por si se redujo el límite entre corridas
+
+    # ---------- rutas ----------
+    @staticmethod
+    def _key(method: str, url: str) -> str:
+        return hashlib.sha1(f"{method.upper()} {url}".encode("utf-8")).hexdigest()
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.body")
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.meta.json")
+
+    # ---------- lectura / escritura ----------
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        if key not in self._index:
+            return None
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._body_path(key), "r", encoding="utf-8") as f:
+                meta["body"] = f.read()
+            return meta
+        except (OSError, ValueError):
+            with self._lock:
+                self._drop(key)
+            return None
+
+    def _write(self, key: str, meta: Dict[str, Any], body: str) -> None:
+        for path, content in ((self._body_path(key), body),
+                              (self._meta_path(key), json.dumps(meta))):
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        size = os.path.getsize(self._body_path(key))
+        with self._lock:
+            old = self._index.get(key)
+            self._size += size - (old[0] if old else 0)
+            self._index[key] = [size, time.time()]
+            self._evict_if_needed()
+
+    def _touch(self, key: str) -> None:
+        with self._lock:
+            if key in self._index:
+                self._index[key][1] = time.time()
+        try:
+            os.utime(self._meta_path(key))
+        except OSError:
+            pass
+
+    def _drop(self, key: str) -> None:
+        # Llamar con _lock tomado: modifica _index y _size
+        entry = self._index.pop(key, None)
+        if entry:
+            self._size -= entry[0]
+        for path in (self._body_path(key), self._meta_path(key)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict_if_needed(self) -> None:
+        """Desaloja las entradas menos usadas hasta quedar por debajo del 90% del límite."""
+        if self._size <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        for key, _ in sorted(self._index.items(), key=lambda kv: kv[1][1]):
+            if self._size <= target:
+                break
+            self._drop(key)
+            self.evicted += 1
+
+    # ---------- API principal ----------
+    def fetch(self, send: Callable[..., requests.Response], method: str, url: str, **kwargs) -> str:
+        """
+        Igual que send(method, url, **kwargs).text pero pasando por la caché.
+        `send` es la función que hace la petición real (p. ej. session.request).
+        `url` debe incluir la query completa (se usa como clave).
+        """
+        key = self._key(method, url)
+        entry = self._read(key)
+        ttl = self.ttls.get(clasificar_url(url), 0)
+
+        if entry and time.time() - entry.get("stored_at", 0) < ttl:
+            with self._lock:
+                self.hits += 1
+            self._touch(key)
+            return entry["body"]
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        resp = send(method, url, headers=headers, **kwargs)
+        if resp.status_code == 304 and entry:
+            with self._lock:
+                self.revalidated += 1
+            body = entry.pop("body")
+            entry["stored_at"] = time.time()
+            self._write(key, entry, body)
+            return body
+
+        resp.raise_for_status()
+        with self._lock:
+            self.misses += 1
+        body = resp.text
+        self._write(key, {
+            "method": method.upper(),
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "stored_at": time.time(),
+        }, body)
+        return body
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "revalidated_304": self.revalidated,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "entries": len(self._index),
+            "mb": round(self._size / (1024 * 1024), 2),
+        }
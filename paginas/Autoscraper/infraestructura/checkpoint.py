@@ -0,0 +1,84 @@
+from __future__ import annotations
+import json, os, threading, time
+from typing import Any, Dict, List, Set, Tuple
+from paginas.Autoscraper.dominio.modelo import now_utc
+from paginas.Autoscraper.infraestructura.archivos import escribir_atomico
+
+
+class CrawlCheckpoint:
+    """
+    Avance de una corrida larga, persistido en JSON (escritura atómica: tmp + os.replace).
+    Guarda conjuntos de claves ya hechas por tipo ("base", "pagina", "url") y la posición
+    actual del recorrido. Las marcas quedan pendientes hasta confirmar(), que App llama
+    después de persistir cada lote: nada se da por hecho antes de estar guardado.
+    El archivo se reescribe como mucho cada `intervalo` segundos (y al cerrar, con guardar());
+    si la corrida se corta entre dos escrituras, al reanudar solo se repite ese tramo.
+    """
+
+    def __init__(self, path: str, reanudar: bool = False, intervalo: float = 30.0):
+        self.path = path
+        self.intervalo = intervalo
+        self.posicion: Dict[str, Any] = {}
+        self._hechos: Dict[str, Set[str]] = {}
+        self._pendientes: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+        self._sucio = False
+        self._escrito = time.monotonic()
+        self.reanudado = False
+        if reanudar and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._hechos = {tipo: set(claves) for tipo, claves in data.get("hechos", {}).items()}
+            self.posicion = data.get("posicion", {})
+            self.reanudado = True
+
+    def hecho(self, tipo: str, clave: Any) -> bool:
+        return str(clave) in self._hechos.get(tipo, ())
+
+    def hechos(self, tipo: str) -> Set[str]:
+        return set(self._hechos.get(tipo, ()))
+
+    def marcar(self, tipo: str, clave: Any) -> None:
+        """Registra una marca; cuenta como hecha recién en el próximo confirmar()."""
+        with self._lock:
+            self._pendientes.append((tipo, str(clave)))
+
+    def confirmar(self) -> None:
+        """Promueve las marcas pendientes; guarda el archivo si pasó `intervalo` desde la última escritura."""
+        with self._lock:
+            for tipo, clave in self._pendientes:
+                self._hechos.setdefault(tipo, set()).add(clave)
+            self._pendientes.clear()
+            self._sucio = True
+            toca = time.monotonic() - self._escrito >= self.intervalo
+        if toca:
+            self.guardar()
+
+    def guardar(self) -> None:
+        """Escribe lo confirmado hasta ahora, si cambió desde la última escritura."""
+        with self._lock:
+            if not self._sucio:
+                return
+            self._sucio = False
+            self._escrito = time.monotonic()
+            data = {
+                "actualizado": now_utc().isoformat(),
+                "posicion": self.posicion,
+                "hechos": {tipo: sorted(claves) for tipo, claves in self._hechos.items()},
+            }
+        escribir_atomico(self.path, json.dumps(data, ensure_ascii=False))
+
+    def terminar(self) -> None:
+        """Corrida completa: el próximo arranque empieza de cero."""
+        with self._lock:
+            self._hechos.clear()
+            self._pendientes.clear()
+            self.posicion = {}
+            self._sucio = False
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def resumen(self) -> Dict[str, int]:
+        return {tipo: len(claves) for tipo, claves in self._hechos.items()}
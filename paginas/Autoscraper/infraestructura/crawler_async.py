@@ -0,0 +1,252 @@
+from __future__ import annotations
+from typing import Dict, List, Iterator, Callable, Optional, Set
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import asyncio, logging, time
+from paginas.Autoscraper.dominio.modelo import Vehiculo
+from paginas.Autoscraper.infraestructura.checkpoint import CrawlCheckpoint
+from paginas.Autoscraper.infraestructura.frontera import UrlFrontier
+from paginas.Autoscraper.infraestructura.metricas import METRICAS
+from paginas.Autoscraper.infraestructura.registro import Progreso
+from paginas.Autoscraper.infraestructura.api_cliente_PatioTuerca import (
+    URL_BASE,
+    FichaExtractor,
+    PatioTuercaRepositorio,
+    PoolDeParseo,
+    RequestsWebClient,
+    generar_codigo_base64,
+    vehiculo_desde_ficha,
+)
+
+_FIN = object()
+
+log = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Limitador token-bucket: `rate` peticiones/segundo con ráfagas de hasta `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = max(0.01, float(rate))
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.rate
+                METRICAS.inc("sleep_seconds_total", espera, fuente="patiotuerca", origen="token_bucket")
+                await asyncio.sleep(espera)
+
+
+class AsyncPatioTuercaCrawler:
+    """
+    Alternativa concurrente a PatioTuercaRepositorio.
+    Mantiene varias descargas (listados y fichas) en vuelo a la vez, limitadas por
+    un token-bucket por host en lugar de pausas fijas entre peticiones.
+    Las descargas siguen usando el cliente síncrono, en un pool de hilos.
+    """
+
+    def __init__(self, web_client: RequestsWebClient, concurrency: int = 4,
+                 rate_per_host: float = 1.25, burst: int = 2, num_paginas: int = 300):
+        self.web = web_client
+        self.concurrency = max(1, int(concurrency))
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.num_paginas = num_paginas
+        self.omitir: Optional[Callable[[str], bool]] = None
+        self.parseo: Optional[PoolDeParseo] = None
+        self.checkpoint: Optional[CrawlCheckpoint] = None
+        self.frontera: Optional[UrlFrontier] = None
+        # Reutiliza la extracción de URLs del repositorio síncrono
+        self._listados = PatioTuercaRepositorio(web_client, pausa=0, num_paginas=num_paginas)
+
+    # ---------- infraestructura async ----------
+    async def _en_hilo(self, url: str, fn: Callable, *args):
+        """Espera turno en el bucket del host y ejecuta la descarga bloqueante en el pool."""
+        host = urlparse(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        async with self._sem:
+            await bucket.acquire()
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    def _descargar_ficha(self, url: str) -> Vehiculo | None:
+        html = self.web.fetch_html(url)
+        return vehiculo_desde_ficha(FichaExtractor.parsear_html(html, url))
+
+    async def _descargar_y_parsear(self, url: str) -> Vehiculo | None:
+        """Descarga en el pool de hilos y parsea en los procesos de `parseo`."""
+        async with self._sem_parseo:
+            html = await self._en_hilo(url, self.web.fetch_html, url)
+            ficha = await asyncio.wrap_future(self.parseo.enviar(html, url))
+        return vehiculo_desde_ficha(ficha)
+
+    async def _ficha(self, url: str, clave_base: str, cola: asyncio.Queue) -> None:
+        # Se reserva en la frontera y se confirma recién al entregar la ficha; si falla se libera
+        clave = FichaExtractor.clave_frontera(url)
+        if self.frontera is not None and not self.frontera.reservar(clave):
+            self._cont["duplicadas"] += 1
+            return
+        entregada = False
+        try:
+            entregada = await self._procesar_ficha(url, clave_base, cola)
+        finally:
+            if self.frontera is not None:
+                if entregada:
+                    self.frontera.confirmar(clave)
+                else:
+                    self.frontera.liberar(clave)
+
+    async def _procesar_ficha(self, url: str, clave_base: str, cola: asyncio.Queue) -> bool:
+        """Descarga y entrega la ficha. False si no se pudo (la frontera no la da por vista)."""
+        vid = FichaExtractor.id_desde_url(url)
+        if vid and self.omitir and self.omitir(vid):
+            self._cont["omitidos"] += 1
+            return True
+        if self.checkpoint and self.checkpoint.hecho("url", url):
+            self._cont["hechos"] += 1
+            return True
+        try:
+            if self.parseo is None:
+                vehiculo = await self._en_hilo(url, self._descargar_ficha, url)
+            else:
+                vehiculo = await self._descargar_y_parsear(url)
+        except Exception as e:
+            log.warning("⚠️ Error al procesar %s: %s", url, e)
+            self._fallidas.add(clave_base)
+            return False
+        if vehiculo is None:
+            self._fallidas.add(clave_base)
+            return False
+        self._cont["extraidos"] += 1
+        log.debug("🔹 %d: %s OK", self._cont["extraidos"], vehiculo.id)
+        self._progreso.tick()
+        await cola.put(vehiculo)
+        return True
+
+    async def _producir(self, anio: int, bases: List[str], cola: asyncio.Queue) -> None:
+        try:
+            await self._recorrer(anio, bases, cola)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._error = e
+        await cola.put(_FIN)
+
+    async def _lanzar_ficha(self, url: str, clave_base: str, cola: asyncio.Queue, fichas: Set[asyncio.Task]) -> None:
+        """
+        Crea la tarea de la ficha cuando hay cupo: con la cola llena las tareas quedan esperando
+        entregar, retienen su cupo y el recorrido de listados se detiene hasta que el consumidor avance.
+        """
+        await self._cupo.acquire()
+        tarea = asyncio.create_task(self._ficha(url, clave_base, cola))
+        fichas.add(tarea)
+
+        def _fin(t: asyncio.Task) -> None:
+            fichas.discard(t)
+            self._cupo.release()
+
+        tarea.add_done_callback(_fin)
+
+    async def _recorrer(self, anio: int, bases: List[str], cola: asyncio.Queue) -> None:
+        fichas: Set[asyncio.Task] = set()
+        for i in bases:
+            clave_base = f"{anio}|{i}"
+            if self.checkpoint and self.checkpoint.hecho("base", clave_base):
+                log.info("⏭️ Año %s, url base %s: completada en una corrida anterior", anio, i)
+                continue
+            log.info("🚗 Buscando vehículos del año %s de la url base: %s (async)", anio, i)
+            base_url = f"{i}/-/-/-/{anio}"
+            pagina, fin = 1, False
+            # Ventana de listados en paralelo: empieza en 1 y se duplica (hasta `concurrency`) solo
+            # mientras las páginas vengan llenas (tantas URLs como la primera); una página corta
+            # suele ser la última, así que la siguiente se pide sola para confirmar el final
+            ancho, llena = 1, 0
+            while not fin and pagina <= self.num_paginas:
+                ventana = list(range(pagina, min(pagina + ancho, self.num_paginas + 1)))
+                urls_pag = [base_url if p == 1 else f"{base_url}?page={generar_codigo_base64(p - 1)}"
+                            for p in ventana]
+                resultados = await asyncio.gather(
+                    *(self._en_hilo(u, self._listados._extraer_urls_vehiculos, u) for u in urls_pag),
+                    return_exceptions=True,
+                )
+                for p, res in zip(ventana, resultados):
+                    if isinstance(res, Exception):
+                        log.warning("❌ Error en página %s: %s", p, res)
+                        fin = True
+                        break
+                    if not res:
+                        log.info("⚠️ No hay más resultados para %s", anio)
+                        self._bases_completas.append(clave_base)
+                        fin = True
+                        break
+                    log.debug("✅ %d URLs encontradas en página %s", len(res), p)
+                    self._cont["urls"] += len(res)
+                    llena = llena or len(res)
+                    for u in res:
+                        await self._lanzar_ficha(u, clave_base, cola, fichas)
+                pagina += len(ventana)
+                completas = not fin and all(len(r) >= llena for r in resultados)
+                ancho = min(ancho * 2, self.concurrency) if completas else 1
+        await asyncio.gather(*fichas)
+
+    # ---------- interfaz compatible con PatioTuercaRepositorio ----------
+    def iter_vehiculos_por_anio(self, anio: int, bases: Optional[List[str]] = None) -> Iterator[Vehiculo]:
+        """
+        Entrega las fichas del año según terminan. El event loop avanza mientras se
+        espera el siguiente elemento; la cola acotada pone freno si el consumidor se atrasa.
+        """
+        loop = asyncio.new_event_loop()
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        self._sem = asyncio.Semaphore(self.concurrency)
+        if self.parseo is not None:
+            # Descargas en vuelo + HTML esperando parseo: lo que puede estar en memoria a la vez
+            self._sem_parseo = asyncio.Semaphore(self.concurrency + self.parseo.max_pendientes)
+        # Fichas en vuelo (descargando, en parseo o esperando lugar en la cola)
+        self._cupo = asyncio.Semaphore(2 * self.concurrency + (self.parseo.max_pendientes if self.parseo else 0))
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._cont = {"urls": 0, "extraidos": 0, "omitidos": 0, "hechos": 0, "duplicadas": 0}
+        self._bases_completas: List[str] = []
+        self._fallidas: Set[str] = set()
+        self._error: Optional[Exception] = None
+        self._progreso = Progreso(log, f"fichas extraídas del año {anio}")
+        cola: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        productor = loop.create_task(self._producir(anio, list(bases or URL_BASE), cola))
+        try:
+            while True:
+                item = loop.run_until_complete(cola.get())
+                if item is _FIN:
+                    break
+                yield item
+            if self._error is not None:
+                raise self._error
+            if self.checkpoint:
+                # Las páginas de listado no se marcan: al reanudar se releen y se saltan sus fichas hechas
+                for clave in self._bases_completas:
+                    if clave not in self._fallidas:
+                        self.checkpoint.marcar("base", clave)
+            log.info("📊 Año %s: %d URLs encontradas | extraídos: %d | omitidos vigentes: %d | duplicados: %d",
+                     anio, self._cont["urls"], self._cont["extraidos"], self._cont["omitidos"],
+                     self._cont["duplicadas"])
+        finally:
+            # Corte anticipado del consumidor: cancelar productor y fichas en vuelo
+            pendientes = [t for t in asyncio.all_tasks(loop) if not t.done()]
+            for t in pendientes:
+                t.cancel()
+            if pendientes:
+                loop.run_until_complete(asyncio.gather(*pendientes, return_exceptions=True))
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            loop.close()
+
+    def obtener_vehiculos_por_anio(self, anio: int, bases: Optional[List[str]] = None) -> List[Vehiculo]:
+        return list(self.iter_vehiculos_por_anio(anio, bases))
@@ -0,0 +1,109 @@
+"""
+Esquemas declarativos de traducción: por cada columna destino, sus alias de origen en orden
+de preferencia y su normalizador. Un esquema se compila una sola vez (al importar el
+traductor) a tablas de búsqueda (nivel, clave) por columna, renombres y normalizadores;
+agregar una fuente o un alias es editar el esquema, sin tocar el traductor.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+Normalizador = Callable[[Any], Any]
+
+
+@dataclass(frozen=True)
+class Campo:
+    """
+    Columna de salida. `alias`: claves de origen en orden; gana el primer valor no vacío
+    (como `a or b`) y, si ninguno lo es, queda el del último alias.
+    Sin alias, la columna solo reserva su lugar y la llena el traductor (derivados, json).
+    """
+    destino: str
+    alias: Tuple[str, ...] = ()
+    normalizar: Optional[Normalizador] = None
+
+
+@dataclass(frozen=True)
+class Esquema:
+    """
+    `niveles`: sub-diccionarios del registro donde también se buscan los alias, del más al
+    menos prioritario; cada uno es una lista de claves alternativas (la primera no vacía).
+    El registro mismo es siempre el último nivel.
+    `renombres`: origen → destino para traducir el registro completo (claves no listadas se conservan).
+    """
+    nombre: str
+    campos: Tuple[Campo, ...]
+    niveles: Tuple[Tuple[str, ...], ...] = ()
+    renombres: Mapping[str, str] = field(default_factory=dict)
+    vacios_a_none: bool = False
+
+    def compilar(self) -> "EsquemaCompilado":
+        return EsquemaCompilado(self)
+
+
+# Por columna: por cada alias, los (nivel, clave) donde buscarlo en orden de prioridad
+Busquedas = Tuple[Tuple[Tuple[int, str], ...], ...]
+
+
+class EsquemaCompilado:
+    """Esquema listo para usar: búsquedas precalculadas, renombres cacheados y normalizadores por columna."""
+
+    def __init__(self, esquema: Esquema):
+        self.esquema = esquema
+        self.columnas = tuple(c.destino for c in esquema.campos)
+        self._niveles = tuple(tuple(claves) for claves in esquema.niveles)
+        # El registro es el último nivel; un alias vale lo del primer nivel que lo contiene
+        orden = range(len(self._niveles) + 1)
+        self._busquedas: Tuple[Tuple[str, Busquedas], ...] = tuple(
+            (c.destino, tuple(tuple((n, alias) for n in orden) for alias in c.alias)) for c in esquema.campos
+        )
+        self._normalizadores = tuple((c.destino, c.normalizar) for c in esquema.campos if c.normalizar)
+        self._renombres = dict(esquema.renombres)
+        self._claves: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def extraer(self, rec: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Valor crudo de cada columna: el primer alias con valor no vacío (o el del último alias),
+        igual que {**rec, **nivel_k, ..., **nivel_0}.get(alias) sin fusionar los diccionarios.
+        """
+        niveles: List[Dict[str, Any]] = []
+        for alternativas in self._niveles:
+            nivel = None
+            for clave in alternativas:
+                nivel = rec.get(clave)
+                if nivel:
+                    break
+            niveles.append(nivel or {})
+        niveles.append(rec)
+        out: Dict[str, Any] = {}
+        for destino, busquedas in self._busquedas:
+            valor = None
+            for donde in busquedas:
+                valor = None
+                for n, clave in donde:
+                    if clave in niveles[n]:
+                        valor = niveles[n][clave]
+                        break
+                if valor:
+                    break
+            out[destino] = valor
+        return out
+
+    def traducir(self, rec: Dict[str, Any]) -> Dict[str, Any]:
+        """Columnas del esquema para un registro: extraídas, normalizadas y (si aplica) sin textos vacíos."""
+        out = self.extraer(rec)
+        for destino, fn in self._normalizadores:
+            out[destino] = fn(out[destino])
+        if self.esquema.vacios_a_none:
+            for k, v in out.items():
+                if isinstance(v, str) and not v.strip():
+                    out[k] = None
+        return out
+
+    def renombrar(self, rec: Dict[str, Any]) -> Dict[str, Any]:
+        """El registro completo con las claves renombradas; la tabla se arma una vez por juego de claves."""
+        claves = tuple(rec)
+        destino = self._claves.get(claves)
+        if destino is None:
+            destino = self._claves[claves] = tuple(self._renombres.get(k, k) for k in claves)
+        return dict(zip(destino, rec.values()))
@@ -0,0 +1,151 @@
+from __future__ import annotations
+import datetime, hashlib, logging, math, os, struct
+from typing import Any, Dict, Optional, Set
+from paginas.Autoscraper.dominio.modelo import now_utc
+from paginas.Autoscraper.infraestructura.archivos import escribir_atomico
+
+log = logging.getLogger(__name__)
+
+# Encabezado de la frontera persistida: marca + instante (epoch s) en que empezó su generación
+_MAGIA = b"UFR1"
+_ENCABEZADO = struct.Struct("<4sd")
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom compacto: pertenencia aproximada sin falsos negativos.
+    Con `capacidad` elementos la tasa de falsos positivos queda cerca de `error`
+    (≈1,8 MB para un millón de claves al 0,1%).
+    """
+
+    def __init__(self, capacidad: int, error: float = 0.001):
+        capacidad = max(1, int(capacidad))
+        self.m = max(8, int(math.ceil(-capacidad * math.log(error) / math.log(2) ** 2)))
+        self.k = max(1, int(round(self.m / capacidad * math.log(2))))
+        self.bits = bytearray((self.m + 7) // 8)
+
+    def _posiciones(self, clave: str):
+        # Doble hashing (Kirsch–Mitzenmacher) sobre un único blake2b
+        h = hashlib.blake2b(clave.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(h[:8], "little")
+        h2 = int.from_bytes(h[8:], "little") | 1
+        return [(h1 + i * h2) % self.m for i in range(self.k)]
+
+    def __contains__(self, clave: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._posiciones(clave))
+
+    def add(self, clave: str) -> None:
+        for p in self._posiciones(clave):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def to_bytes(self) -> bytes:
+        return struct.pack("<QI", self.m, self.k) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        bloom = cls.__new__(cls)
+        bloom.m, bloom.k = struct.unpack_from("<QI", data)
+        bloom.bits = bytearray(data[struct.calcsize("<QI"):])
+        return bloom
+
+
+class UrlFrontier:
+    """
+    Frontera de URLs ya vistas en la corrida: agregar() responde en O(1) si una clave
+    es nueva. Se comparte entre años y urls base, así una ficha que reaparece al
+    desplazarse la paginación (o en autos y pesados) no se descarga dos veces.
+    - Por defecto un set en memoria (exacto).
+    - Con `bloom_capacidad`, un filtro de Bloom (memoria fija; algún falso positivo).
+    - Con `path`, se carga al iniciar y se guarda con guardar() (deduplicación entre corridas).
+      Con `vigencia` (segundos; p. ej. --fresh-days), la frontera guardada se descarta cuando
+      su generación es más vieja: ninguna ficha queda sin volver a descargarse más allá de la
+      ventana de vigencia (las vigentes igual se omiten por la política de App).
+    Los crawlers reservan la clave antes de descargar y la confirman al entregar la ficha;
+    si la descarga falla la liberan, así la ficha se reintenta si vuelve a aparecer.
+    """
+
+    def __init__(self, path: Optional[str] = None, bloom_capacidad: Optional[int] = None,
+                 error: float = 0.001, vigencia: Optional[float] = None):
+        self.path = path
+        self.vistas = self.duplicadas = 0
+        self._set: Optional[Set[str]] = None
+        self._bloom: Optional[BloomFilter] = None
+        self._en_vuelo: Set[str] = set()
+        self.creada = now_utc().timestamp()
+        datos = self._leer(vigencia) if path and os.path.exists(path) else None
+        if bloom_capacidad:
+            self._bloom = BloomFilter.from_bytes(datos) if datos else BloomFilter(bloom_capacidad, error)
+        else:
+            self._set = set()
+            if datos:
+                self._set.update(linea for linea in datos.decode("utf-8").split("\n") if linea.strip())
+
+    def _leer(self, vigencia: Optional[float]) -> Optional[bytes]:
+        """Contenido de la generación guardada; None si venció o es de un formato anterior."""
+        with open(self.path, "rb") as f:
+            datos = f.read()
+        if len(datos) < _ENCABEZADO.size or datos[:len(_MAGIA)] != _MAGIA:
+            log.info("♻️ Frontera %s sin fecha de generación: se empieza de cero", self.path)
+            return None
+        _, creada = _ENCABEZADO.unpack_from(datos)
+        if vigencia is not None and self.creada - creada >= vigencia:
+            log.info("♻️ Frontera %s vencida (generación del %s): se empieza de cero",
+                     self.path,
+                     datetime.datetime.fromtimestamp(creada, datetime.timezone.utc).isoformat(timespec="seconds"))
+            return None
+        self.creada = creada
+        return datos[_ENCABEZADO.size:]
+
+    def agregar(self, clave: str) -> bool:
+        """True si la clave es nueva (y queda registrada); False si ya se había visto."""
+        if self._bloom is not None:
+            nueva = clave not in self._bloom
+            if nueva:
+                self._bloom.add(clave)
+        else:
+            nueva = clave not in self._set
+            if nueva:
+                self._set.add(clave)
+        if nueva:
+            self.vistas += 1
+        else:
+            self.duplicadas += 1
+        return nueva
+
+    def reservar(self, clave: str) -> bool:
+        """
+        True si la clave no se vio ni está en vuelo; queda en vuelo (sin registrarse como vista,
+        ni guardarse) hasta confirmar() o liberar(). False cuenta como duplicada.
+        """
+        vista = clave in self._bloom if self._bloom is not None else clave in self._set
+        if vista or clave in self._en_vuelo:
+            self.duplicadas += 1
+            return False
+        self._en_vuelo.add(clave)
+        return True
+
+    def confirmar(self, clave: str) -> None:
+        """La ficha reservada se entregó: queda registrada como vista."""
+        self._en_vuelo.discard(clave)
+        self.agregar(clave)
+
+    def liberar(self, clave: str) -> None:
+        """La ficha reservada no se pudo entregar: se olvida la reserva."""
+        self._en_vuelo.discard(clave)
+
+    def guardar(self) -> None:
+        """Persiste la frontera con la fecha de su generación (la conserva si se cargó de disco)."""
+        if not self.path:
+            return
+        if self._bloom is not None:
+            cuerpo = self._bloom.to_bytes()
+        else:
+            cuerpo = "".join(f"{clave}\n" for clave in sorted(self._set)).encode("utf-8")
+        escribir_atomico(self.path, _ENCABEZADO.pack(_MAGIA, self.creada) + cuerpo)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tipo": "bloom" if self._bloom is not None else "set",
+            "nuevas": self.vistas,
+            "duplicadas": self.duplicadas,
+        }
@@ -0,0 +1,134 @@
+"""
+Historial append-only de precio, kilometraje y estado de cada ficha, junto al repositorio.
+
+El merge sobrescribe la fila cuando una ficha cambia; este almacén guarda, con su instante,
+solo los campos seguidos que cambiaron (y todos los conocidos cuando la ficha aparece).
+Una ficha sin cambios no ocupa nada por más snapshots diarios que se hagan.
+
+Tabla `cambios` (SQLite, WITHOUT ROWID): clave (id_record, instante), así "historial del
+vehículo X" es un rango contiguo de la clave; y un índice por instante para "todo lo que
+cambió desde T". Los números van con afinidad NUMERIC (enteros de 1 a 8 bytes).
+"""
+from __future__ import annotations
+import datetime, json, os, sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from paginas.Autoscraper.dominio.modelo import now_utc
+
+# Campo seguido → tipo de columna. Se lee de la columna de la fila o, si no la tiene, de su json
+# (Autocor guarda precio, estado y disponibilidad solo en el registro traducido).
+CAMPOS: Dict[str, str] = {
+    "precio": "NUMERIC",
+    "kilometraje": "NUMERIC",
+    "estado": "TEXT",
+    "disponibilidad": "TEXT",
+}
+
+Cambio = Tuple[Optional[Dict[str, Any]], Dict[str, Any]]
+
+
+def _texto(valor: Any) -> str:
+    # Mismo criterio que SqliteRepository._as_text: las filas guardadas vuelven como texto
+    return "" if valor is None else str(valor)
+
+
+def valores_seguidos(row: Dict[str, Any]) -> Dict[str, str]:
+    """Campos seguidos de una fila, como texto ("" si no están)."""
+    valores = {c: _texto(row.get(c)) for c in CAMPOS}
+    if all(valores.values()) or not row.get("json"):
+        return valores
+    try:
+        payload = json.loads(row["json"])
+    except (TypeError, ValueError):
+        return valores
+    if isinstance(payload, dict):
+        for c, v in valores.items():
+            if not v:
+                valores[c] = _texto(payload.get(c))
+    return valores
+
+
+def diferencias(viejo: Optional[Dict[str, Any]], nuevo: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Campos seguidos que cambiaron de `viejo` a `nuevo` (todos los conocidos si `viejo` es None).
+    Un valor que desaparece en `nuevo` no cuenta como cambio: la fuente a veces lo omite.
+    """
+    despues = valores_seguidos(nuevo)
+    antes = valores_seguidos(viejo) if viejo is not None else {}
+    return {c: v for c, v in despues.items() if v and v != antes.get(c)}
+
+
+class HistorialCambios:
+    """
+    Observador del merge (MergeService.on_change): recibe los pares (fila anterior, fila nueva)
+    de cada lote con contenido distinto y agrega una fila por ficha con sus campos cambiados.
+    """
+
+    def __init__(self, path: str, table: str = "cambios"):
+        self._path = path
+        self.table = table
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _create_schema(self) -> None:
+        cols = ", ".join(f'"{c}" {tipo}' for c, tipo in CAMPOS.items())
+        self.conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ("id_record" TEXT NOT NULL, "instante" INTEGER NOT NULL, '
+            f'{cols}, PRIMARY KEY ("id_record", "instante")) WITHOUT ROWID'
+        )
+        self.conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_instante ON {self.table} ("instante")')
+        self.conn.commit()
+
+    def __call__(self, cambios: List[Cambio]) -> None:
+        self.registrar(cambios)
+
+    def registrar(self, cambios: Iterable[Cambio], instante: Optional[datetime.datetime] = None) -> int:
+        """Agrega los cambios de un lote en una transacción. Devuelve las filas de historial escritas."""
+        ts = int((instante or now_utc()).timestamp())
+        params = []
+        for viejo, nuevo in cambios:
+            key = _texto(nuevo.get("id_record")).strip()
+            cambiados = diferencias(viejo, nuevo) if key else {}
+            if cambiados:
+                params.append([key, ts, *(cambiados.get(c) for c in CAMPOS)])
+        if not params:
+            return 0
+        quoted = ", ".join(f'"{c}"' for c in CAMPOS)
+        marks = ", ".join("?" * (len(CAMPOS) + 2))
+        # Dos cambios de la misma ficha en el mismo segundo (ids repetidos en el lote) se combinan
+        updates = ", ".join(f'"{c}"=COALESCE(excluded."{c}", "{c}")' for c in CAMPOS)
+        sql = (f'INSERT INTO {self.table} ("id_record", "instante", {quoted}) VALUES ({marks}) '
+               f'ON CONFLICT("id_record", "instante") DO UPDATE SET {updates}')
+        with self.conn:
+            self.conn.executemany(sql, params)
+        return len(params)
+
+    def _filas(self, cursor) -> Iterator[Dict[str, Any]]:
+        names = [d[0] for d in cursor.description]
+        for values in cursor:
+            fila = {k: v for k, v in zip(names, values) if v is not None}
+            fila["instante"] = datetime.datetime.fromtimestamp(fila["instante"], datetime.timezone.utc)
+            yield fila
+
+    def de_vehiculo(self, id_record: str) -> List[Dict[str, Any]]:
+        """Cambios de una ficha en orden cronológico (rango de la clave primaria)."""
+        return list(self._filas(self.conn.execute(
+            f'SELECT * FROM {self.table} WHERE "id_record" = ? ORDER BY "instante"', (_texto(id_record).strip(),)
+        )))
+
+    def desde(self, instante: datetime.datetime) -> Iterator[Dict[str, Any]]:
+        """Todos los cambios desde `instante` (inclusive), en orden cronológico (índice por instante)."""
+        return self._filas(self.conn.execute(
+            f'SELECT * FROM {self.table} WHERE "instante" >= ? ORDER BY "instante", "id_record"',
+            (int(instante.timestamp()),),
+        ))
+
+    def close(self) -> None:
+        self.conn.close()
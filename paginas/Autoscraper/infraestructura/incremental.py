@@ -0,0 +1,109 @@
+from __future__ import annotations
+import json, logging, math, os, threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from paginas.Autoscraper.dominio.modelo import epoch_iso, now_utc
+from paginas.Autoscraper.infraestructura.archivos import escribir_atomico
+
+log = logging.getLogger(__name__)
+
+
+class SincroniaIncremental:
+    """
+    Marca de agua de una fuente paginada (Autocor), persistida en JSON (escritura atómica).
+
+    La marca es el created_dt más reciente visto en la última corrida completada (processedAt
+    no sirve: es el sello del reproceso nocturno de todo el catálogo). En modo incremental, una
+    página cuyas fichas ya están todas guardadas y no son posteriores a la marca indica que el
+    resto del catálogo (más antiguo, si la API lista de lo más nuevo a lo más viejo) tampoco
+    cambió: el recorrido se corta ahí. Ese orden se verifica en cada página: si las fechas de
+    una página no son decrecientes, no se corta más en esta corrida y la próxima es un barrido
+    completo. Además, cada `barrido_dias` se recorre todo igual, por si algo cambió sin tocar
+    su fecha. La marca solo avanza en confirmar(), al terminar bien la corrida.
+    """
+
+    def __init__(self, path: str, barrido_dias: float = 7.0,
+                 campos: Tuple[str, ...] = ("created_dt",), id_field: str = "id_record"):
+        self.path = path
+        self.barrido_dias = barrido_dias
+        self.campos = campos
+        self.id_field = id_field
+        self.marca: Optional[float] = None
+        self.ultimo_barrido: Optional[float] = None
+        self.desordenada = False
+        self._vista = -math.inf
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # Una marca calculada con otros campos no es comparable: se rehace con un barrido
+            if data.get("campos") == list(campos):
+                self.marca = data.get("marca")
+                self.ultimo_barrido = data.get("ultimo_barrido")
+
+    def toca_barrido(self) -> bool:
+        """True si esta corrida debe recorrer todo: no hay marca o el último barrido es viejo."""
+        if self.marca is None or self.ultimo_barrido is None:
+            return True
+        return now_utc().timestamp() - self.ultimo_barrido >= self.barrido_dias * 86400
+
+    def instante(self, entidad: Dict[str, Any]) -> float:
+        """Fecha más reciente de la entidad (epoch s); NaN si no trae ninguna legible."""
+        legibles = [t for t in (epoch_iso(entidad.get(c)) for c in self.campos) if not math.isnan(t)]
+        return max(legibles) if legibles else math.nan
+
+    def observar(self, entidades: Iterable[Dict[str, Any]]) -> None:
+        """Registra las fechas de una página descargada (candidata a nueva marca) y verifica su orden."""
+        instantes = self._instantes(entidades)
+        self._verificar_orden(instantes)
+        tope = max(instantes, default=math.nan)
+        if not math.isnan(tope):
+            with self._lock:
+                self._vista = max(self._vista, tope)
+
+    def pagina_conocida(self, entidades: Iterable[Dict[str, Any]], guardada: Callable[[str], bool]) -> bool:
+        """
+        True si todas las fichas de la página están guardadas y no son posteriores a la marca.
+        Nunca True si esta página, o una anterior de la corrida, no venía ordenada.
+        """
+        if self.marca is None:
+            return False
+        entidades = list(entidades)
+        if not self._verificar_orden(self._instantes(entidades)) or not entidades:
+            return False
+        for e in entidades:
+            t = self.instante(e)
+            # Sin fecha legible no se puede afirmar que no cambió
+            if not t <= self.marca or not guardada(str(e.get(self.id_field, "")).strip()):
+                return False
+        return True
+
+    def _instantes(self, entidades: Iterable[Dict[str, Any]]) -> List[float]:
+        return [t for t in map(self.instante, entidades) if not math.isnan(t)]
+
+    def _verificar_orden(self, instantes: List[float]) -> bool:
+        """False (y desordenada desde ahora) si la página no va de lo más nuevo a lo más viejo."""
+        if all(a >= b for a, b in zip(instantes, instantes[1:])):
+            return not self.desordenada
+        with self._lock:
+            aviso = not self.desordenada
+            self.desordenada = True
+        if aviso:
+            log.warning("⚠️ Sincronización incremental: la API no lista de lo más nuevo a lo más viejo; "
+                        "no se corta el recorrido y la próxima corrida será un barrido completo")
+        return False
+
+    def confirmar(self, barrido: bool) -> None:
+        """
+        Corrida completada: avanza la marca y, si fue un barrido completo, su fecha.
+        Si alguna página vino desordenada, se borra la fecha del barrido: la próxima recorre todo.
+        """
+        with self._lock:
+            if self._vista > -math.inf:
+                self.marca = max(self.marca if self.marca is not None else -math.inf, self._vista)
+            if self.desordenada:
+                self.ultimo_barrido = None
+            elif barrido:
+                self.ultimo_barrido = now_utc().timestamp()
+            data = {"actualizado": now_utc().isoformat(), "campos": list(self.campos),
+                    "marca": self.marca, "ultimo_barrido": self.ultimo_barrido}
+        escribir_atomico(self.path, json.dumps(data, ensure_ascii=False))
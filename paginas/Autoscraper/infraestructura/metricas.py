@@ -0,0 +1,169 @@
+from __future__ import annotations
+import bisect, json, math, threading, time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from paginas.Autoscraper.infraestructura.archivos import escribir_atomico
+
+# Límites superiores (segundos) de los buckets: del parseo en µs a descargas lentas
+BUCKETS: Tuple[float, ...] = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                              0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+DESCRIPCIONES: Dict[str, str] = {
+    "http_fetch_seconds": "Latencia de las peticiones HTTP (sin caché) por fuente y clase de URL",
+    "http_bytes_total": "Bytes de cuerpo descargados",
+    "http_requests_total": "Peticiones HTTP por código de estado",
+    "http_retries_total": "Reintentos de descargas fallidas",
+    "sleep_seconds_total": "Segundos dormidos por ritmo, pausas o backoff (suma entre hilos)",
+    "parse_seconds": "Tiempo de FichaExtractor.parsear_html por ficha",
+    "translate_seconds": "Tiempo de traducción por lote (build_csv_row de cada registro)",
+    "merge_seconds": "Tiempo de MergeService por lote",
+    "save_seconds": "Tiempo de persistencia por lote (append/save)",
+    "registros_total": "Registros procesados por resultado del merge",
+    "run_seconds": "Duración de la corrida",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histograma:
+    """Histograma acumulativo al estilo Prometheus, más mínimo y máximo."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observar(self, valor: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, valor)] += 1
+        self.count += 1
+        self.sum += valor
+        self.min = min(self.min, valor)
+        self.max = max(self.max, valor)
+
+    def cuantil(self, q: float) -> float:
+        """Aproximación: límite superior del bucket donde cae el cuantil q."""
+        if not self.count:
+            return 0.0
+        objetivo, acumulado = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            acumulado += n
+            if acumulado >= objetivo:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+
+class RegistroMetricas:
+    """
+    Contadores e histogramas con etiquetas, seguros entre hilos.
+    Se exportan como reporte JSON de la corrida o como textfile de Prometheus
+    (para el textfile collector del node exporter).
+    """
+
+    def __init__(self, prefijo: str = "autoscraper"):
+        self.prefijo = prefijo
+        self._contadores: Dict[Tuple[str, Labels], float] = {}
+        self._histogramas: Dict[Tuple[str, Labels], Histograma] = {}
+        self._lock = threading.Lock()
+
+    # ---------- registro ----------
+    def inc(self, nombre: str, valor: float = 1.0, **labels: Any) -> None:
+        clave = (nombre, _labels(labels))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0.0) + valor
+
+    def observar(self, nombre: str, valor: float, **labels: Any) -> None:
+        clave = (nombre, _labels(labels))
+        with self._lock:
+            hist = self._histogramas.get(clave)
+            if hist is None:
+                hist = self._histogramas[clave] = Histograma()
+            hist.observar(valor)
+
+    @contextmanager
+    def medir(self, nombre: str, **labels: Any) -> Iterator[None]:
+        """Observa en `nombre` los segundos que tarda el bloque."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nombre, time.perf_counter() - t0, **labels)
+
+    def total(self, nombre: str, **filtro: Any) -> float:
+        """Suma de un contador (o de la suma de un histograma) sobre las series que cumplen el filtro."""
+        filtro_l = set(_labels(filtro))
+        with self._lock:
+            suma = sum(v for (n, l), v in self._contadores.items() if n == nombre and filtro_l <= set(l))
+            suma += sum(h.sum for (n, l), h in self._histogramas.items() if n == nombre and filtro_l <= set(l))
+        return suma
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+    # ---------- exportación ----------
+    def reporte(self) -> Dict[str, Any]:
+        with self._lock:
+            contadores = [{"nombre": n, "labels": dict(l), "valor": round(v, 6)}
+                          for (n, l), v in sorted(self._contadores.items())]
+            histogramas = [{
+                "nombre": n, "labels": dict(l), "count": h.count, "sum": round(h.sum, 6),
+                "min": round(h.min, 6) if h.count else 0.0, "max": round(h.max, 6),
+                "p50": h.cuantil(0.5), "p90": h.cuantil(0.9), "p99": h.cuantil(0.99),
+            } for (n, l), h in sorted(self._histogramas.items())]
+        return {"generado": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "contadores": contadores, "histogramas": histogramas}
+
+    def prometheus(self) -> str:
+        lineas: List[str] = []
+        vistos = set()
+
+        def cabecera(nombre: str, tipo: str) -> None:
+            if nombre in vistos:
+                return
+            vistos.add(nombre)
+            lineas.append(f"# HELP {self.prefijo}_{nombre} {DESCRIPCIONES.get(nombre, nombre)}")
+            lineas.append(f"# TYPE {self.prefijo}_{nombre} {tipo}")
+
+        def serie(nombre: str, labels: Labels, valor: float, extra: Optional[Tuple[str, str]] = None) -> str:
+            pares = list(labels) + ([extra] if extra else [])
+            etiquetas = ",".join(f'{k}="{_escapar(v)}"' for k, v in pares)
+            return f"{self.prefijo}_{nombre}{{{etiquetas}}} {valor:.6g}" if etiquetas else \
+                f"{self.prefijo}_{nombre} {valor:.6g}"
+
+        with self._lock:
+            for (n, l), v in sorted(self._contadores.items()):
+                cabecera(n, "counter")
+                lineas.append(serie(n, l, v))
+            for (n, l), h in sorted(self._histogramas.items()):
+                cabecera(n, "histogram")
+                acumulado = 0
+                for limite, cuenta in zip(h.buckets, h.counts):
+                    acumulado += cuenta
+                    lineas.append(serie(f"{n}_bucket", l, acumulado, ("le", f"{limite:g}")))
+                lineas.append(serie(f"{n}_bucket", l, h.count, ("le", "+Inf")))
+                lineas.append(serie(f"{n}_sum", l, h.sum))
+                lineas.append(serie(f"{n}_count", l, h.count))
+        return "\n".join(lineas) + "\n"
+
+    def escribir_json(self, path: str) -> None:
+        escribir_atomico(path, json.dumps(self.reporte(), ensure_ascii=False, indent=2))
+
+    def escribir_prometheus(self, path: str) -> None:
+        # El textfile collector lee *.prom: se reemplaza atómicamente para no exponer archivos a medias
+        escribir_atomico(path, self.prometheus())
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Registro compartido por todo el proceso (clientes, extractor, App)
+METRICAS = RegistroMetricas()
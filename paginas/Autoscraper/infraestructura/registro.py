@@ -0,0 +1,60 @@
+from __future__ import annotations
+import logging, queue, sys, threading, time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Raíz de los loggers del paquete (logging.getLogger(__name__) en cada módulo)
+RAIZ = "paginas.Autoscraper"
+
+FORMATO = "%(asctime)s %(levelname)-7s %(threadName)s %(name)s: %(message)s"
+
+
+def configurar_logging(nivel: str = "INFO", archivo: Optional[str] = None) -> QueueListener:
+    """
+    Envía los logs del paquete a consola (y a `archivo` si se indica) a través de una cola:
+    los hilos del crawl solo encolan el registro; un hilo aparte formatea y escribe.
+    Devuelve el listener ya iniciado; hay que llamar a .stop() al terminar para vaciar la cola.
+    """
+    formato = logging.Formatter(FORMATO, datefmt="%H:%M:%S")
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if archivo:
+        handlers.append(logging.FileHandler(archivo, encoding="utf-8"))
+    for h in handlers:
+        h.setFormatter(formato)
+
+    cola: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    raiz = logging.getLogger(RAIZ)
+    raiz.handlers[:] = [QueueHandler(cola)]
+    raiz.setLevel(nivel.upper())
+    raiz.propagate = False
+
+    listener = QueueListener(cola, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+class Progreso:
+    """
+    Línea de progreso con límite de frecuencia: cuenta eventos y escribe como mucho
+    una línea INFO cada `cada_s` segundos (el detalle por evento queda en DEBUG).
+    """
+
+    def __init__(self, log: logging.Logger, que: str, cada_s: float = 5.0):
+        self.log = log
+        self.que = que
+        self.cada_s = cada_s
+        self.n = 0
+        self._t0 = time.monotonic()
+        self._ultimo = self._t0
+        self._lock = threading.Lock()
+
+    def tick(self, n: int = 1, detalle: str = "") -> None:
+        with self._lock:
+            self.n += n
+            ahora = time.monotonic()
+            if ahora - self._ultimo < self.cada_s:
+                return
+            self._ultimo = ahora
+            total = self.n
+            ritmo = total / max(ahora - self._t0, 1e-9)
+        self.log.info("… %d %s (%.1f/s)%s", total, self.que, ritmo, f" | {detalle}" if detalle else "")
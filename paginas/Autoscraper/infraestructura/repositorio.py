@@ -1,8 +1,10 @@
 # autocor_solid/infra/repositories.py
 from __future__ import annotations
-import os, csv
-from typing import Protocol, Dict, Any
+import io, os, csv, sqlite3
+from urllib.request import pathname2url
+from typing import Protocol, Dict, Any, Iterable, List, Optional, TextIO
 from paginas.Autoscraper.dominio.modelo import CSV_COLS
+from paginas.Autoscraper.infraestructura.archivos import escribir_atomico
 
 class Repository(Protocol):
     def load(self) -> Dict[str, Dict[str, str]]: ...
@@ -10,6 +12,10 @@ class Repository(Protocol):
     @property
     def path(self) -> str: ...
 
+class AppendableRepository(Repository, Protocol):
+    """Repositorio que persiste lotes incrementales; save() queda para la compactación final."""
+    def append(self, rows: Iterable[Dict[str, Any]]) -> None: ...
+
 class CsvRepository(Repository):
     def __init__(self, path: str):
         self._path = path
@@ -33,10 +39,188 @@ class CsvRepository(Repository):
         return rows
 
     def save(self, rows_by_id: Dict[str, Dict[str, Any]]) -> None:
+        self._write_csv(self._path, rows_by_id)
+
+    @staticmethod
+    def _write_csv(path: str, rows_by_id: Dict[str, Dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            CsvRepository._write_rows(f, rows_by_id)
+
+    @staticmethod
+    def _write_rows(f: TextIO, rows_by_id: Dict[str, Dict[str, Any]]) -> None:
+        w = csv.DictWriter(f, fieldnames=CSV_COLS)
+        w.writeheader()
+        for _, row in sorted(rows_by_id.items(), key=lambda kv: str(kv[0])):
+            out_row = {c: row.get(c, "") for c in CSV_COLS}
+            w.writerow(out_row)
+
+class JournaledCsvRepository(CsvRepository):
+    """
+    CSV base + diario de cambios (`<path>.journal`).
+    - append(): agrega al diario solo las filas nuevas/actualizadas del lote (con fsync).
+    - load(): lee la base y re-aplica el diario encima.
+    - save(): compacta → reescribe la base ordenada y vacía el diario.
+    La compactación ocurre al final de la corrida o al superar `max_journal_bytes`.
+    """
+
+    def __init__(self, path: str, max_journal_bytes: int = 64 * 1024 * 1024):
+        super().__init__(path)
+        self.journal_path = f"{path}.journal"
+        self.max_journal_bytes = max_journal_bytes
+
+    def load(self) -> Dict[str, Dict[str, str]]:
+        rows = super().load()
+        if not os.path.exists(self.journal_path):
+            return rows
+        with open(self.journal_path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                if not row:
+                    continue
+                key = str(row.get("id_record", "")).strip()
+                if key:
+                    rows[key] = row
+        return rows
+
+    def append(self, rows: Iterable[Dict[str, Any]]) -> None:
+        rows = list(rows)
+        if not rows:
+            return
         os.makedirs(os.path.dirname(self._path), exist_ok=True)
-        with open(self._path, "w", newline="", encoding="utf-8") as f:
+        if self._journal_header() not in (None, CSV_COLS):
+            # Diario de una versión con otras columnas: se compacta antes de agregarle filas
+            self.save(self.load())
+        new_file = not os.path.exists(self.journal_path) or os.path.getsize(self.journal_path) == 0
+        with open(self.journal_path, "a", newline="", encoding="utf-8") as f:
             w = csv.DictWriter(f, fieldnames=CSV_COLS)
-            w.writeheader()
-            for _, row in sorted(rows_by_id.items(), key=lambda kv: str(kv[0])):
-                out_row = {c: row.get(c, "") for c in CSV_COLS}
-                w.writerow(out_row)
+            if new_file:
+                w.writeheader()
+            for row in rows:
+                w.writerow({c: row.get(c, "") for c in CSV_COLS})
+            f.flush()
+            os.fsync(f.fileno())
+
+        if os.path.getsize(self.journal_path) > self.max_journal_bytes:
+            self.save(self.load())
+
+    def _journal_header(self) -> Optional[List[str]]:
+        if not os.path.exists(self.journal_path):
+            return None
+        with open(self.journal_path, "r", encoding="utf-8", newline="") as f:
+            return next(csv.reader(f), None)
+
+    def save(self, rows_by_id: Dict[str, Dict[str, Any]]) -> None:
+        # Escritura atómica de la base (ya en disco, con fsync); el diario se borra solo después.
+        # Si se cae entre ambos pasos, re-aplicar el diario es idempotente.
+        buf = io.StringIO(newline="")
+        self._write_rows(buf, rows_by_id)
+        escribir_atomico(self._path, buf.getvalue().encode("utf-8"))
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+class SqliteRepository(Repository):
+    """
+    Repositorio en SQLite (modo WAL) con upserts por lotes sobre `id_record`.
+    Además de load()/save() expone lookup()/append()/count(), de modo que App
+    solo lee y escribe los ids del lote en curso en vez del dataset completo.
+    `solo_lectura`: abre la base existente sin crear ni migrar el esquema (p. ej. la salida
+    final consultada por varios shards a la vez).
+    """
+
+    INDEXED_COLS = ("fecha_ingreso", "marca", "modelo", "anio")
+
+    def __init__(self, path: str, table: str = "fichas", solo_lectura: bool = False):
+        self._path = path
+        self.table = table
+        if solo_lectura:
+            uri = "file:" + pathname2url(os.path.abspath(path)) + "?mode=ro"
+            self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            return
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _create_schema(self) -> None:
+        cols = ", ".join(f'"{c}" TEXT' for c in CSV_COLS if c != "id_record")
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table} ("id_record" TEXT PRIMARY KEY, {cols})')
+        # Columnas agregadas a CSV_COLS después de crear la base
+        present = {r[1] for r in self.conn.execute(f"PRAGMA table_info({self.table})")}
+        for c in CSV_COLS:
+            if c not in present:
+                self.conn.execute(f'ALTER TABLE {self.table} ADD COLUMN "{c}" TEXT')
+        for c in self.INDEXED_COLS:
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_{c} ON {self.table} ("{c}")')
+        self.conn.commit()
+
+    @staticmethod
+    def _as_text(value: Any) -> str:
+        # Mismo criterio que csv.DictWriter: None → "", resto → str()
+        return "" if value is None else str(value)
+
+    def _rows(self, cursor) -> Dict[str, Dict[str, str]]:
+        names = [d[0] for d in cursor.description]
+        rows: Dict[str, Dict[str, str]] = {}
+        for values in cursor:
+            row = dict(zip(names, values))
+            rows[row["id_record"]] = row
+        return rows
+
+    def load(self) -> Dict[str, Dict[str, str]]:
+        return self._rows(self.conn.execute(f"SELECT * FROM {self.table}"))
+
+    def lookup(self, ids: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """Filas existentes para los ids dados (consulta por clave primaria, en tramos)."""
+        ids = [i for i in dict.fromkeys(self._as_text(i).strip() for i in ids) if i]
+        found: Dict[str, Dict[str, str]] = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            found.update(self._rows(
+                self.conn.execute(f"SELECT * FROM {self.table} WHERE id_record IN ({marks})", chunk)
+            ))
+        return found
+
+    def count(self) -> int:
+        return self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def append(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Upsert por lotes (INSERT ... ON CONFLICT) en una sola transacción."""
+        quoted = ", ".join(f'"{c}"' for c in CSV_COLS)
+        marks = ", ".join("?" * len(CSV_COLS))
+        updates = ", ".join(f'"{c}"=excluded."{c}"' for c in CSV_COLS if c != "id_record")
+        sql = (f"INSERT INTO {self.table} ({quoted}) VALUES ({marks}) "
+               f"ON CONFLICT(id_record) DO UPDATE SET {updates}")
+        params = [
+            [self._as_text(row.get(c)) for c in CSV_COLS]
+            for row in rows
+            if self._as_text(row.get("id_record")).strip()  # sin id no hay clave de upsert
+        ]
+        if not params:
+            return
+        with self.conn:
+            self.conn.executemany(sql, params)
+
+    def save(self, rows_by_id: Dict[str, Dict[str, Any]]) -> None:
+        self.append(rows_by_id.values())
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def importar_csv_a_sqlite(csv_path: str, db_path: str) -> int:
+    """Importación única de un `datos/*_fichas.csv` existente. Devuelve las filas importadas."""
+    rows = CsvRepository(csv_path).load()
+    repo = SqliteRepository(db_path)
+    try:
+        repo.save(rows)
+        return len(rows)
+    finally:
+        repo.close()
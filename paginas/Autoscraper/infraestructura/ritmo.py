@@ -0,0 +1,123 @@
+from __future__ import annotations
+from typing import Dict, Any, Optional
+from email.utils import parsedate_to_datetime
+import datetime, random, threading, time
+import requests
+from paginas.Autoscraper.infraestructura.cache_http import clasificar_url
+from paginas.Autoscraper.infraestructura.metricas import METRICAS
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After en segundos; acepta tanto '120' como una fecha HTTP."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = parsedate_to_datetime(value)
+        return max(0.0, (dt - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class AimdPacer:
+    """
+    Ritmo adaptativo de peticiones (AIMD), compartido por los clientes web y API.
+    - Éxito con latencia baja → sube la tasa de forma aditiva (`increase` req/s).
+    - 429, 5xx o timeout → baja la tasa de forma multiplicativa (`decrease`).
+    - Retry-After bloquea nuevas peticiones hasta que vence.
+    Todas las esperas llevan jitter para no sincronizar ráfagas.
+    """
+
+    def __init__(self, rate: float = 1.0, min_rate: float = 0.1, max_rate: float = 5.0,
+                 increase: float = 0.1, decrease: float = 0.5, target_latency: float = 1.5,
+                 jitter: float = 0.2):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.target_latency = target_latency
+        self.jitter = jitter
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.requests = self.backoffs = self.retry_after_hits = 0
+        self.slept = 0.0
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def wait(self) -> float:
+        """Bloquea hasta el próximo turno libre. Devuelve los segundos dormidos."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot, self._blocked_until)
+            self._next_slot = start + self._jittered(1.0 / self.rate)
+            self.requests += 1
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+            with self._lock:
+                self.slept += delay
+        return delay
+
+    def on_success(self, latency: float) -> None:
+        with self._lock:
+            if latency <= self.target_latency:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_error(self, status: Optional[int] = None, retry_after: Optional[float] = None) -> None:
+        """status=None significa timeout o error de conexión."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.backoffs += 1
+            if retry_after:
+                self.retry_after_hits += 1
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+    def observe(self, status: Optional[int], latency: float, retry_after: Optional[str] = None) -> None:
+        """Registra el resultado de una petición ya hecha."""
+        if status is None or status == 429 or status >= 500:
+            self.on_error(status, parse_retry_after(retry_after))
+        else:
+            self.on_success(latency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate_req_s": round(self.rate, 2),
+                "requests": self.requests,
+                "backoffs": self.backoffs,
+                "retry_after": self.retry_after_hits,
+                "slept_s": round(self.slept, 1),
+                "blocked_s": round(max(0.0, self._blocked_until - time.monotonic()), 1),
+            }
+
+
+def paced_request(session: requests.Session, pacer: Optional[AimdPacer], method: str, url: str,
+                  fuente: str = "http", **kwargs) -> requests.Response:
+    """
+    session.request() respetando el turno del pacer e informándole el resultado.
+    Registra latencia, bytes, código de estado y espera en METRICAS (por fuente y clase de URL).
+    """
+    clase = clasificar_url(url)
+    if pacer is not None:
+        METRICAS.inc("sleep_seconds_total", pacer.wait(), fuente=fuente, origen="ritmo")
+    t0 = time.monotonic()
+    try:
+        resp = session.request(method, url, **kwargs)
+    except (requests.Timeout, requests.ConnectionError):
+        METRICAS.inc("http_requests_total", fuente=fuente, clase=clase, status="error")
+        if pacer is not None:
+            pacer.observe(None, time.monotonic() - t0)
+        raise
+    latency = time.monotonic() - t0
+    METRICAS.observar("http_fetch_seconds", latency, fuente=fuente, clase=clase)
+    METRICAS.inc("http_requests_total", fuente=fuente, clase=clase, status=resp.status_code)
+    METRICAS.inc("http_bytes_total", len(resp.content), fuente=fuente, clase=clase)
+    if pacer is not None:
+        pacer.observe(resp.status_code, latency, resp.headers.get("Retry-After"))
+    return resp
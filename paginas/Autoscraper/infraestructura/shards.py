@@ -0,0 +1,119 @@
+from __future__ import annotations
+import glob, os, re
+from typing import Any, Dict, Iterable, List, Tuple
+from paginas.Autoscraper.dominio.servicios import RESULTADOS, MergeService
+
+# Unidad de trabajo de PatioTuerca: (año, url base del listado)
+Unidad = Tuple[int, str]
+
+_SHARD = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+_SUFIJO_SHARD = re.compile(r"\.shard-\d+-of-\d+$")
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """'i/N' → (i, N), con 1 <= i <= N."""
+    match = _SHARD.match(spec or "")
+    if not match:
+        raise ValueError(f"Shard inválido: {spec!r} (se espera i/N, p. ej. 2/4)")
+    indice, total = int(match.group(1)), int(match.group(2))
+    if not 1 <= indice <= total:
+        raise ValueError(f"Shard inválido: {spec!r} (i debe estar entre 1 y N)")
+    return indice, total
+
+
+def unidades_de_trabajo(anios: Iterable[int], bases: Iterable[str]) -> List[Unidad]:
+    """Todas las unidades (año, base) en el orden del recorrido completo."""
+    bases = list(bases)
+    return [(anio, base) for anio in anios for base in bases]
+
+
+def unidades_del_shard(unidades: List[Unidad], indice: int, total: int) -> List[Unidad]:
+    """
+    Reparto determinista por turnos: la unidad k va al shard (k mod N) + 1.
+    Mismas listas de años y bases → mismo reparto en cualquier máquina; al alternar,
+    cada shard recibe años recientes y antiguos (y autos y pesados) por igual.
+    """
+    return unidades[indice - 1::total]
+
+
+def ruta_shard(path: str, indice: int, total: int) -> str:
+    """datos/patiotuerca_fichas.csv → datos/patiotuerca_fichas.shard-2-of-4.csv"""
+    raiz, ext = os.path.splitext(path)
+    return f"{raiz}.shard-{indice}-of-{total}{ext}"
+
+
+def ruta_final(path: str) -> str:
+    """datos/patiotuerca_fichas.shard-2-of-4.csv → datos/patiotuerca_fichas.csv (inversa de ruta_shard)."""
+    raiz, ext = os.path.splitext(path)
+    return _SUFIJO_SHARD.sub("", raiz) + ext
+
+
+def totales_shards(path: str) -> List[int]:
+    """Valores de N de las salidas parciales existentes para `path`, ordenados."""
+    raiz, ext = os.path.splitext(path)
+    patron = re.compile(re.escape(raiz) + r"\.shard-\d+-of-(\d+)" + re.escape(ext) + "$")
+    encontrados = (patron.match(p) for p in glob.glob(f"{glob.escape(raiz)}.shard-*-of-*{ext}"))
+    return sorted({int(m.group(1)) for m in encontrados if m})
+
+
+def rutas_shards(path: str, total: int) -> List[str]:
+    """
+    Salidas parciales existentes de los shards 1..N de `path`, en orden. Solo las de este N:
+    los parciales que queden de corridas con otro N no se mezclan.
+    """
+    rutas = (ruta_shard(path, i, total) for i in range(1, total + 1))
+    return [r for r in rutas if os.path.exists(r)]
+
+
+def retirar_shards(rutas: Iterable[str]) -> None:
+    """Borra las salidas parciales ya fusionadas (y el diario o los archivos WAL de SQLite)."""
+    for ruta in rutas:
+        for path in (ruta, f"{ruta}.journal", f"{ruta}-wal", f"{ruta}-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class SalidaFinal:
+    """
+    La salida final vista desde un shard, solo para leer. Un shard escribe en su parcial
+    (vacío al empezar), pero la vigencia y el hash de cada ficha se comparan con lo ya guardado
+    en la salida final, como en una corrida sin shards: así se omiten las fichas vigentes y
+    solo llega al parcial lo nuevo o cambiado. Con SQLite se consulta por id; un CSV (o diario)
+    se carga una vez.
+    """
+
+    def __init__(self, repo: Any):
+        self._repo = repo
+        self._filas = None if hasattr(repo, "lookup") else repo.load()
+
+    @property
+    def path(self) -> str:
+        return self._repo.path
+
+    def lookup(self, ids: Iterable[Any]) -> Dict[str, Dict[str, str]]:
+        if self._filas is None:
+            return self._repo.lookup(ids)
+        claves = (str(i).strip() for i in ids)
+        return {k: self._filas[k] for k in claves if k in self._filas}
+
+    def close(self) -> None:
+        if hasattr(self._repo, "close"):
+            self._repo.close()
+
+
+def fusionar_shards(destino, parciales: Iterable[Any], merger: MergeService) -> Dict[str, int]:
+    """
+    Funde las salidas parciales en el repositorio final con la misma política
+    de vigencia que una corrida normal. Devuelve las métricas acumuladas.
+    """
+    merged = destino.load()
+    indice = merger.indexar(merged)
+    totals = {**dict.fromkeys(RESULTADOS, 0), "shards": 0}
+    for parcial in parciales:
+        merged, metrics, _ = merger.merge_with_changes(merged, parcial.load().values(), indice=indice, en_sitio=True)
+        for k in RESULTADOS:
+            totals[k] += metrics[k]
+        totals["shards"] += 1
+    destino.save(merged)
+    totals["total"] = len(merged)
+    return totals
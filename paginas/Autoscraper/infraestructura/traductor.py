@@ -2,14 +2,99 @@
 from __future__ import annotations
 import re, json
 from typing import Protocol, Dict, Any, Optional
-import time
+import logging, time
+from paginas.Autoscraper.dominio.modelo import hash_contenido
+from paginas.Autoscraper.infraestructura.esquema import Campo, Esquema
+
+log = logging.getLogger(__name__)
+
+# Un solo codificador reutilizado (json.dumps con opciones crea uno por llamada)
+_JSON = json.JSONEncoder(ensure_ascii=False)
+# Forma canónica para hash_contenido: claves ordenadas y separadores fijos, así la huella no
+# depende del orden en que el sitio entrega las claves (la columna json conserva el original)
+_JSON_CANONICO = json.JSONEncoder(ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
 
 class RecordTranslator(Protocol):
     def translate(self, rec: Dict[str, Any]) -> Dict[str, Any]: ...
     def build_csv_row(self, rec: Dict[str, Any]) -> Dict[str, Any]: ...
 
-class AutocorRecordTranslator(RecordTranslator):
-    _mapping = {
+
+# Autocor ------------------------------
+
+_RE_CILINDRAJE_DECIMAL = re.compile(r'(\d{1,2}[\.,]\d)')
+_RE_CILINDRAJE_ENTERO = re.compile(r'\b(\d{1,2})\b(?=.*\s(L|litros|AC|TA|TM)\b|$)', flags=re.IGNORECASE)
+_RE_TA = re.compile(r'\bTA\b')
+_RE_TM = re.compile(r'\bTM\b')
+
+
+def _extract_cilindraje(version: str) -> Optional[str]:
+    if not version:
+        return None
+    m = _RE_CILINDRAJE_DECIMAL.search(version)
+    if m:
+        return m.group(1).replace(",", ".")
+    m2 = _RE_CILINDRAJE_ENTERO.search(version)
+    if m2:
+        return m2.group(1)
+    return None
+
+
+def _transmision_por_orden(saving_plan_order: str) -> Optional[str]:
+    if saving_plan_order:
+        spo = saving_plan_order.strip().upper()
+        if "AUTOM" in spo:
+            return "Automática"
+        if "MANU" in spo:
+            return "Manual"
+    return None
+
+
+def _transmision_por_version(version: str) -> Optional[str]:
+    v = (version or "").upper()
+    if _RE_TA.search(v):
+        return "Automática"
+    if _RE_TM.search(v):
+        return "Manual"
+    return None
+
+
+def _infer_transmision(version: str, saving_plan_order: str) -> Optional[str]:
+    por_orden = _transmision_por_orden(saving_plan_order)
+    return por_orden if por_orden is not None else _transmision_por_version(version)
+
+
+# Claves del registro traducido que cambian sin que cambie la ficha: el reproceso nocturno
+# de Autocor reescribe processedAt de casi todo el catálogo y days_in_stock sube cada día.
+# Se guardan en el json pero no entran en hash_contenido.
+VOLATILES_AUTOCOR = frozenset({"procesado_el", "dias_en_stock"})
+
+
+def _huella_autocor(rec_es: Dict[str, Any]) -> str:
+    return hash_contenido(_JSON_CANONICO.encode({k: v for k, v in rec_es.items() if k not in VOLATILES_AUTOCOR}))
+
+
+def _kilometraje_autocor(valor: Any) -> Any:
+    try:
+        return int(float(valor))
+    except Exception:
+        return valor
+
+
+ESQUEMA_AUTOCOR = Esquema(
+    nombre="autocor",
+    campos=(
+        Campo("id_record", ("id_record",)),
+        Campo("maraca", ("brand",)),              # (intencional: "maraca" tal como lo pediste)
+        Campo("model", ("model",)),
+        Campo("transmision"),                     # derivado de version / saving_plan_order
+        Campo("cilindraje"),                      # derivado de version
+        Campo("kilometraje", ("odometer",)),
+        Campo("fecha_ingreso", ("created_dt",)),
+        Campo("json"),                            # registro completo traducido
+        Campo("hash_contenido"),                  # huella del json sin VOLATILES_AUTOCOR (cambios en el merge)
+    ),
+    renombres={
         "id_record": "id_registro",
         "id": "id",
         "media": "media",
@@ -51,158 +136,148 @@ class AutocorRecordTranslator(RecordTranslator):
         "integration_reference_code": "codigo_referencia_integracion",
         "version": "version",
         "purchase_price": "precio_compra",
-    }
+    },
+)
+_AUTOCOR = ESQUEMA_AUTOCOR.compilar()
+
+
+class AutocorRecordTranslator(RecordTranslator):
 
     def translate(self, rec: Dict[str, Any]) -> Dict[str, Any]:
-        out = { self._mapping.get(k, k): v for k, v in rec.items() }
+        out = _AUTOCOR.renombrar(rec)
 
         # Derivados
-        out["transmision"] = self._infer_transmision(rec.get("version", ""), rec.get("saving_plan_order", "") or "")
-        cil = self._extract_cilindraje(rec.get("version", ""))
+        out["transmision"] = _infer_transmision(rec.get("version", ""), rec.get("saving_plan_order", "") or "")
+        cil = _extract_cilindraje(rec.get("version", ""))
         if cil:
             out["cilindraje"] = cil
 
         # Normalización
         if "kilometraje" in out:
-            try:
-                out["kilometraje"] = int(float(out["kilometraje"]))
-            except Exception:
-                pass
+            out["kilometraje"] = _kilometraje_autocor(out["kilometraje"])
 
         return out
 
     def build_csv_row(self, rec: Dict[str, Any]) -> Dict[str, Any]:
-        rec_es = self.translate(rec)
-        return {
-            "id_record": rec.get("id_record"),
-            "maraca": rec.get("brand"),              # (intencional: "maraca" tal como lo pediste)
-            "model": rec.get("model"),
-            "transmision": rec_es.get("transmision", ""),
-            "cilindraje": rec_es.get("cilindraje", ""),
-            "kilometraje": rec.get("odometer"),
-            "fecha_ingreso": rec.get("created_dt"),
-            "json": json.dumps(rec_es, ensure_ascii=False),
-        }
+        return self._completar(_AUTOCOR.traducir(rec), self.translate(rec))
 
     @staticmethod
-    def _extract_cilindraje(version: str) -> Optional[str]:
-        if not version:
-            return None
-        m = re.search(r'(\d{1,2}[\.,]\d)', version)
-        if m:
-            return m.group(1).replace(",", ".")
-        m2 = re.search(r'\b(\d{1,2})\b(?=.*\s(L|litros|AC|TA|TM)\b|$)', version, flags=re.IGNORECASE)
-        if m2:
-            return m2.group(1)
+    def _completar(fila: Dict[str, Any], rec_es: Dict[str, Any]) -> Dict[str, Any]:
+        """Columnas que no salen directo del registro: los derivados y el JSON traducido."""
+        fila["transmision"] = rec_es.get("transmision", "")
+        fila["cilindraje"] = rec_es.get("cilindraje", "")
+        fila["json"] = _JSON.encode(rec_es)
+        fila["hash_contenido"] = _huella_autocor(rec_es)
+        return fila
+
+
+# Patio Tuerca ------------------------------
+
+_RE_CC = re.compile(r"(\d{3,4})")
+_RE_LITROS = re.compile(r"(\d{1,2}[\.,]\d)")
+_RE_PRECIO = re.compile(r"[$.,]")
+_RE_SEPARADORES = re.compile(r"[.,]")
+
+
+def _anio(valor: Any) -> Any:
+    try:
+        if valor:
+            return int(str(valor).strip())
+        return valor
+    except Exception:
         return None
 
-    @staticmethod
-    def _infer_transmision(version: str, saving_plan_order: str) -> Optional[str]:
-        if saving_plan_order:
-            spo = saving_plan_order.strip().upper()
-            if "AUTOM" in spo:
-                return "Automática"
-            if "MANU" in spo:
-                return "Manual"
-        v = (version or "").upper()
-        if re.search(r'\bTA\b', v):
+
+def _precio(valor: Any) -> Any:
+    try:
+        if valor:
+            return float(_RE_PRECIO.sub("", str(valor)).strip())
+        return valor
+    except Exception:
+        return None
+
+
+def _kilometraje(valor: Any) -> Any:
+    if valor:
+        try:
+            # "kms" antes que "km", en ese orden (no es lo mismo que una sola regex kms|km)
+            km_clean = str(valor).lower().replace("kms", "").replace("km", "")
+            return int(_RE_SEPARADORES.sub("", km_clean).strip())
+        except Exception:
+            return None
+    return valor
+
+
+def _transmision(valor: Any) -> Any:
+    if valor:
+        val = str(valor).lower()
+        if "auto" in val:
             return "Automática"
-        if re.search(r'\bTM\b', v):
+        elif "manu" in val:
             return "Manual"
+        else:
+            return None
+    return valor
+
+
+def _cilindraje(valor: Any) -> Any:
+    if valor:
+        val = str(valor).strip()
+        m = _RE_CC.search(val)
+        if m:
+            return int(m.group(1))
+        m2 = _RE_LITROS.search(val)
+        if m2:
+            return float(m2.group(1).replace(",", "."))
         return None
+    return valor
+
+
+ESQUEMA_PATIOTUERCA = Esquema(
+    nombre="patiotuerca",
+    # Prioridad: ficha técnica > resumen > raíz del registro
+    niveles=(("ficha_tecnica", "ficha"), ("summary", "resumen")),
+    campos=(
+        # "id" es la clave de las fichas; "id_record" la que emiten fetch_year / iter_year del
+        # adaptador. Sin ese alias (como al principio) esas filas quedaban todas con id None.
+        Campo("id_record", ("id", "id_record")),
+        Campo("marca", ("Marca", "Brand")),
+        Campo("modelo", ("Modelo", "Model")),
+        Campo("anio", ("Año", "Year"), _anio),
+        Campo("precio", ("Precio", "CashPrice", "Precio Contado"), _precio),
+        Campo("kilometraje", ("Recorrido", "Kilometraje", "Mileage"), _kilometraje),
+        Campo("ciudad", ("Ciudad", "City")),
+        Campo("transmision", ("Transmisión", "Transmission"), _transmision),
+        Campo("cilindraje", ("Motor(cilindraje)", "Engine"), _cilindraje),
+        Campo("combustible", ("Combustible", "FuelType")),
+        Campo("traccion", ("Tracción", "Traction")),
+        Campo("direccion", ("Dirección", "Steering")),
+        Campo("tapizado", ("Tapizado", "InteriorType")),
+        Campo("tipo_pago", ("Tipo de pago", "PaymentType")),
+        Campo("descripcion", ("Subtipo", "Description")),
+        Campo("url", ("url",)),
+        Campo("fecha_ingreso"),                   # momento de la traducción
+        Campo("json"),                            # registro crudo completo
+        Campo("hash_contenido"),                  # huella del registro canónico (sin fecha_ingreso: no es contenido)
+    ),
+    vacios_a_none=True,
+)
+_PATIOTUERCA = ESQUEMA_PATIOTUERCA.compilar()
 
-# Patio Tuerca ------------------------------
 
 class PatioTuercaRecordTranslator:
     """Traduce los registros obtenidos del scraping de PatioTuerca a un formato estándar"""
 
     def translate(self, rec: Dict[str, Any]) -> Dict[str, Any]:
         """Convierte un registro crudo de PatioTuerca (que puede venir anidado) a un formato estándar."""
-
-        # --- Desempaquetar niveles comunes ---
-        ficha = rec.get("ficha_tecnica", {}) or rec.get("ficha", {})
-        summary = rec.get("summary", {}) or rec.get("resumen", {})
-        # --- Unificar todos los niveles posibles ---
-        merged = {**rec, **summary, **ficha}
-        # --- Mapeo estándar ---
-        out = {
-            "id_record": merged.get("id"),
-            "marca": merged.get("Marca") or merged.get("Brand"),
-            "modelo": merged.get("Modelo") or merged.get("Model"),
-            "anio": merged.get("Año") or merged.get("Year"),
-            "precio": merged.get("Precio") or merged.get("CashPrice") or merged.get("Precio Contado"),
-            "kilometraje": merged.get("Recorrido") or merged.get("Kilometraje") or merged.get("Mileage"),
-            "ciudad": merged.get("Ciudad") or merged.get("City"),
-            "transmision": merged.get("Transmisión") or merged.get("Transmission"),
-            "cilindraje": merged.get("Motor(cilindraje)") or merged.get("Engine"),
-            "combustible": merged.get("Combustible") or merged.get("FuelType"),
-            "traccion": merged.get("Tracción") or merged.get("Traction"),
-            "direccion": merged.get("Dirección") or merged.get("Steering"),
-            "tapizado": merged.get("Tapizado") or merged.get("InteriorType"),
-            "tipo_pago": merged.get("Tipo de pago") or merged.get("PaymentType"),
-            "descripcion": merged.get("Subtipo") or merged.get("Description"),
-            "url": merged.get("url"),
-            "fecha_ingreso": time.strftime("%Y-%m-%d %H:%M:%S"),
-        }
-        print("Esto es out: ",out)
-        # --- Normalización de campos numéricos y texto ---
-        # Año
-        try:
-            if out["anio"]:
-                out["anio"] = int(str(out["anio"]).strip())
-        except Exception:
-            out["anio"] = None
-
-        # Precio
-        try:
-            if out["precio"]:
-                val = str(out["precio"]).replace("$", "").replace(".", "").replace(",", "").strip()
-                out["precio"] = float(val)
-        except Exception:
-            out["precio"] = None
-
-        # Kilometraje
-        km_val = out.get("kilometraje")
-        if km_val:
-            try:
-                km_clean = str(km_val).lower().replace("kms", "").replace("km", "").replace(".", "").replace(",", "").strip()
-                out["kilometraje"] = int(km_clean)
-            except Exception:
-                out["kilometraje"] = None
-
-        # Transmisión
-        if "transmision" in out and out["transmision"]:
-            val = str(out["transmision"]).lower()
-            if "auto" in val:
-                out["transmision"] = "Automática"
-            elif "manu" in val:
-                out["transmision"] = "Manual"
-            else:
-                out["transmision"] = None
-
-        # Cilindraje
-        if out.get("cilindraje"):
-            val = str(out["cilindraje"]).strip()
-            m = re.search(r"(\d{3,4})", val)
-            if m:
-                out["cilindraje"] = int(m.group(1))
-            else:
-                m2 = re.search(r"(\d{1,2}[\.,]\d)", val)
-                if m2:
-                    out["cilindraje"] = float(m2.group(1).replace(",", "."))
-                else:
-                    out["cilindraje"] = None
-
-        # Limpiar strings vacíos
-        for k, v in out.items():
-            if isinstance(v, str) and not v.strip():
-                out[k] = None
-
+        out = _PATIOTUERCA.traducir(rec)
+        out["fecha_ingreso"] = time.strftime("%Y-%m-%d %H:%M:%S")
         # Guardar el JSON completo
-        out["json"] = json.dumps(rec, ensure_ascii=False)
-        print("Este es el out que sale: ",out)
+        out["json"] = _JSON.encode(rec)
+        out["hash_contenido"] = hash_contenido(_JSON_CANONICO.encode(rec))
+        log.debug("Registro traducido: %s", out)
         return out
-    
+
     def build_csv_row(self, rec: Dict[str, Any]) -> Dict[str, Any]:
         # aquí simplemente devuelves lo traducido
-        return self.translate(rec)
\ No newline at end of file
+        return self.translate(rec)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+import json, os, random, threading, time
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from paginas.Autoscraper.infraestructura.archivos import escribir_atomico
+from paginas.Autoscraper.infraestructura.cache_http import clasificar_url
+from paginas.Autoscraper.infraestructura.metricas import METRICAS
+from paginas.Autoscraper.infraestructura.ritmo import AimdPacer, paced_request
+
+try:  # urllib3 solo decodifica br si hay un paquete brotli instalado
+    import brotli  # noqa: F401
+    _BR = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        _BR = True
+    except ImportError:
+        _BR = False
+
+ACCEPT_ENCODING = "gzip, deflate, br" if _BR else "gzip, deflate"
+
+# Métodos que se pueden repetir sin efectos (RFC 9110). Una fuente cuyo POST es de solo lectura
+# (el listado ?page=N de Autocor) lo agrega con `metodos=IDEMPOTENTES | {"POST"}`
+IDEMPOTENTES = frozenset({"GET", "HEAD", "OPTIONS"})
+REINTENTAR_STATUS = (429, 500, 502, 503, 504)
+
+
+class _Reintentos(Retry):
+    """
+    Retry de urllib3 con espera exponencial × jitter multiplicativo (como AimdPacer) y
+    sus reintentos y esperas contados en METRICAS con la misma etiqueta `fuente` que paced_request.
+
+    Cada respuesta o error que provoca un reintento se informa al pacer de la petición en curso
+    (`contexto.pacer`, por hilo), y el reintento espera su turno como cualquier petición: sin
+    eso, un 429 absorbido por urllib3 no frenaría el ritmo ni su Retry-After a los demás hilos.
+    """
+
+    def __init__(self, *args: Any, fuente: str = "http", jitter: float = 0.2,
+                 contexto: Optional[threading.local] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.fuente = fuente
+        self.jitter = jitter
+        self.contexto = contexto if contexto is not None else threading.local()
+
+    def new(self, **kw: Any) -> "_Reintentos":
+        # Retry.new() arma la copia solo con sus propios parámetros
+        nuevo = super().new(**kw)
+        nuevo.fuente, nuevo.jitter, nuevo.contexto = self.fuente, self.jitter, self.contexto
+        return nuevo
+
+    @property
+    def pacer(self) -> Optional[AimdPacer]:
+        return getattr(self.contexto, "pacer", None)
+
+    def get_backoff_time(self) -> float:
+        return super().get_backoff_time() * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def increment(self, method: Optional[str] = None, url: Optional[str] = None,
+                  response: Any = None, error: Optional[Exception] = None, *args: Any,
+                  **kwargs: Any) -> "_Reintentos":
+        # Agotados, Retry.increment() lanza MaxRetryError: el último intento lo registra
+        # paced_request con la respuesta (o el error) que recibe
+        nuevo = super().increment(method, url, response, error, *args, **kwargs)
+        METRICAS.inc("http_retries_total", fuente=self.fuente)
+        status = response.status if response is not None else None
+        METRICAS.inc("http_requests_total", fuente=self.fuente, clase=clasificar_url(url or ""),
+                     status=status if status is not None else "error")
+        pacer = self.pacer
+        if pacer is not None:
+            retry_after = response.headers.get("Retry-After") if response is not None else None
+            pacer.observe(status, 0.0, retry_after)
+        return nuevo
+
+    def sleep(self, response: Any = None) -> None:
+        t0 = time.monotonic()
+        super().sleep(response)
+        METRICAS.inc("sleep_seconds_total", time.monotonic() - t0, fuente=self.fuente, origen="reintento")
+        pacer = self.pacer
+        if pacer is not None:
+            METRICAS.inc("sleep_seconds_total", pacer.wait(), fuente=self.fuente, origen="ritmo")
+
+
+class Transporte:
+    """
+    Capa HTTP común de los clientes de Autocor y PatioTuerca:
+    - requests.Session con keep-alive y un pool por host del tamaño de la concurrencia
+      (los hilos del crawl reutilizan conexiones en vez de abrir TCP/TLS nuevas).
+    - Reintentos de urllib3 para `metodos` (por defecto los idempotentes) y errores de conexión:
+      429/5xx y timeouts, con espera exponencial y jitter, respetando Retry-After e informados
+      al pacer de la petición.
+    - Timeouts separados de conexión y de lectura.
+    - Accept-Encoding gzip (y br si está instalado brotli).
+    - Un pequeño estado persistido en JSON (`estado_path`) para recordar entre corridas
+      lo que ya se averiguó del servidor, p. ej. el método HTTP que acepta la API.
+    """
+
+    def __init__(self, user_agent: str, concurrency: int = 1, retries: int = 3,
+                 connect_timeout: float = 5.0, read_timeout: float = 20.0, backoff: float = 1.0,
+                 backoff_max: float = 60.0, jitter: float = 0.2, fuente: str = "http",
+                 accept: Optional[str] = None, estado_path: Optional[str] = None,
+                 metodos: FrozenSet[str] = IDEMPOTENTES):
+        self.fuente = fuente
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        # Pacer de la petición en curso de cada hilo, para los reintentos de urllib3
+        self._contexto = threading.local()
+        self.reintentos = _Reintentos(
+            total=retries, connect=retries, read=retries, status=retries, other=0,
+            allowed_methods=metodos, status_forcelist=REINTENTAR_STATUS,
+            backoff_factor=backoff, backoff_max=backoff_max, raise_on_status=False,
+            respect_retry_after_header=True, fuente=fuente, jitter=jitter, contexto=self._contexto,
+        )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(10, int(concurrency)),
+                              max_retries=self.reintentos)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": user_agent, "Accept-Encoding": ACCEPT_ENCODING})
+        if accept:
+            self.session.headers["Accept"] = accept
+        self.estado_path = estado_path
+        self._estado: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        if estado_path and os.path.exists(estado_path):
+            try:
+                with open(estado_path, "r", encoding="utf-8") as f:
+                    self._estado = json.load(f)
+            except (OSError, ValueError):
+                self._estado = {}
+
+    def request(self, method: str, url: str, pacer: Optional[AimdPacer] = None,
+                **kwargs: Any) -> requests.Response:
+        """paced_request() por la sesión compartida, con los timeouts del transporte por defecto."""
+        kwargs.setdefault("timeout", self.timeout)
+        self._contexto.pacer = pacer
+        try:
+            return paced_request(self.session, pacer, method, url, fuente=self.fuente, **kwargs)
+        finally:
+            self._contexto.pacer = None
+
+    # ---------- Estado entre corridas ----------
+    def recordado(self, clave: str, defecto: Any = None) -> Any:
+        return self._estado.get(clave, defecto)
+
+    def recordar(self, clave: str, valor: Any) -> None:
+        """Guarda `clave` (escritura atómica); sin `estado_path` solo dura la corrida."""
+        with self._lock:
+            if self._estado.get(clave) == valor:
+                return
+            self._estado[clave] = valor
+            data = dict(self._estado)
+        if not self.estado_path:
+            return
+        escribir_atomico(self.estado_path, json.dumps(data, ensure_ascii=False))
+
+    def close(self) -> None:
+        self.session.close()
@@ -1,8 +1,8 @@
 # autocor_solid/main.py
 from __future__ import annotations
-import argparse, os
-from dataclasses import dataclass
+import argparse, logging, os, subprocess, sys
 from paginas.Autoscraper.app import App, AppConfig
+from paginas.Autoscraper.orquestador import Orquestador
 from paginas.Autoscraper.dominio.politicas import ByDaysFreshnessPolicy
 from paginas.Autoscraper.dominio.servicios import MergeService
 from paginas.Autoscraper.dominio.modelo import ANIOS_OBJETIVO
@@ -10,54 +10,291 @@ from paginas.Autoscraper.infraestructura.traductor import (
     AutocorRecordTranslator,
     PatioTuercaRecordTranslator,
 )
-from paginas.Autoscraper.infraestructura.repositorio import CsvRepository
-from paginas.Autoscraper.infraestructura.api_cliente import RequestsApiClient, DEFAULT_BASE_URL
+from paginas.Autoscraper.infraestructura.repositorio import (
+    CsvRepository,
+    JournaledCsvRepository,
+    SqliteRepository,
+    importar_csv_a_sqlite,
+)
+from paginas.Autoscraper.infraestructura.api_cliente import RequestsApiClient
+from paginas.Autoscraper.infraestructura.cache_http import HttpCache
+from paginas.Autoscraper.infraestructura.checkpoint import CrawlCheckpoint
+from paginas.Autoscraper.infraestructura.frontera import UrlFrontier
+from paginas.Autoscraper.infraestructura.historial import HistorialCambios
+from paginas.Autoscraper.infraestructura.incremental import SincroniaIncremental
+from paginas.Autoscraper.infraestructura.metricas import METRICAS
+from paginas.Autoscraper.infraestructura.registro import configurar_logging
+from paginas.Autoscraper.infraestructura.ritmo import AimdPacer
+from paginas.Autoscraper.infraestructura.transporte import IDEMPOTENTES, Transporte
 from paginas.Autoscraper.infraestructura.api_cliente_PatioTuerca import (
+    URL_BASE,
+    FichaExtractor,
     PatioTuercaClientAdapter,
     RequestsWebClient,
 )
+from paginas.Autoscraper.infraestructura.shards import (
+    SalidaFinal,
+    fusionar_shards,
+    parse_shard,
+    retirar_shards,
+    ruta_final,
+    ruta_shard,
+    rutas_shards,
+    totales_shards,
+    unidades_de_trabajo,
+    unidades_del_shard,
+)
+
+# Nombre fijo: con "python -m" __name__ sería "__main__", fuera de la jerarquía del paquete
+log = logging.getLogger("paginas.Autoscraper.main")
 
 # -------------------------
 # Configuración general
 # -------------------------
 
 
-def parse_args() -> tuple[AppConfig, str]:
+BASE_URLS = {
+    "autocor": "https://www.autocor.com.ec/api/listPilot",
+    "patiotuerca": "https://ecuador.patiotuerca.com/usados/-/autos",
+}
+
+
+def parse_args() -> argparse.Namespace:
     ap = argparse.ArgumentParser()
-    ap.add_argument("--source", choices=["autocor", "patiotuerca"], default="autocor",
+    ap.add_argument("--source", choices=list(BASE_URLS), default="autocor",
                     help="Fuente de datos a procesar")
+    ap.add_argument("--sources", default=None,
+                    help="Varias fuentes a la vez en este proceso: 'autocor,patiotuerca' o 'all' "
+                         "(reemplaza a --source)")
+    ap.add_argument("--budgets", default="",
+                    help="Concurrencia por fuente con --sources, p. ej. autocor=8,patiotuerca=2 "
+                         "(por defecto --concurrency)")
     ap.add_argument("--base-url", default=None)
-    ap.add_argument("--timeout", type=int, default=20)
-    ap.add_argument("--retries", type=int, default=3)
+    ap.add_argument("--timeout", type=int, default=20,
+                    help="Timeout de lectura (s) de cada petición")
+    ap.add_argument("--connect-timeout", type=float, default=5.0,
+                    help="Timeout de conexión (s); corto para reintentar pronto un host que no responde")
+    ap.add_argument("--retries", type=int, default=3,
+                    help="Reintentos por petición ante 429/5xx, timeouts o errores de conexión")
     ap.add_argument("--fresh-days", type=int, default=1,
                     help="Días de vigencia de datos (para políticas de merge)")
+    ap.add_argument("--concurrency", type=int, default=4,
+                    help="Páginas de Autocor descargadas en paralelo")
+    ap.add_argument("--engine", choices=["sync", "async"], default="sync",
+                    help="Motor de PatioTuerca: sync (pausas fijas) o async (token-bucket por host)")
+    ap.add_argument("--rate", type=float, default=1.25,
+                    help="Peticiones por segundo por host en el motor async de PatioTuerca")
+    ap.add_argument("--pacing", choices=["fixed", "adaptive"], default="fixed",
+                    help="fixed: pausas fijas originales (por defecto) | adaptive: ritmo AIMD según latencia y errores")
+    ap.add_argument("--max-rate", type=float, default=None,
+                    help="Tope de peticiones/s del ritmo adaptativo (por defecto según la fuente)")
+    ap.add_argument("--parser", choices=["strainer", "soup"], default="strainer",
+                    help="Motor de extracción de fichas de PatioTuerca (soup: árbol completo, más lento)")
+    ap.add_argument("--parse-workers", type=int, default=0,
+                    help="Procesos que parsean las fichas de PatioTuerca en paralelo a las descargas "
+                         "(0: en el mismo hilo; p. ej. el número de núcleos)")
+    ap.add_argument("--batch-size", type=int, default=50,
+                    help="Fichas de PatioTuerca por lote guardado")
+    ap.add_argument("--store", choices=["csv", "journal", "sqlite"], default="csv",
+                    help="csv: reescribe el CSV por lote | journal: diario append-only + compactación | "
+                         "sqlite: upserts indexados en datos/<fuente>_fichas.sqlite")
+    ap.add_argument("--import-csv", action="store_true",
+                    help="Importa datos/<fuente>_fichas.csv a la base SQLite y termina")
+    ap.add_argument("--journal-max-mb", type=int, default=64,
+                    help="Tamaño del diario que dispara una compactación anticipada")
+    ap.add_argument("--cache-dir", default=None,
+                    help="Directorio de caché HTTP en disco (desactivada si se omite)")
+    ap.add_argument("--cache-max-mb", type=int, default=512)
+    ap.add_argument("--cache-ttl", default="",
+                    help="TTL por clase de URL en segundos, p. ej. listado=3600,ficha=43200,api=600")
+    ap.add_argument("--shard", default=None,
+                    help="PatioTuerca: procesa solo el shard i/N de las unidades (año, url base) "
+                         "y escribe datos/patiotuerca_fichas.shard-i-of-N.*")
+    ap.add_argument("--local-shards", type=int, default=0,
+                    help="PatioTuerca: lanza N procesos locales (--shard 1/N … N/N) y fusiona al terminar")
+    ap.add_argument("--merge-shards", type=int, nargs="?", const=0, default=None, metavar="N",
+                    help="Fusiona las salidas parciales shard-i-of-N en datos/<fuente>_fichas.*, las borra "
+                         "y termina (N se deduce si solo hay parciales de un N)")
+    ap.add_argument("--checkpoint", action="store_true",
+                    help="Guarda el avance en datos/<fuente>_fichas.checkpoint.json para poder reanudar "
+                         "con --resume")
+    ap.add_argument("--checkpoint-interval", type=float, default=30.0,
+                    help="Segundos mínimos entre escrituras del checkpoint (0: tras cada lote)")
+    ap.add_argument("--resume", action="store_true",
+                    help="Continúa la corrida interrumpida desde datos/<fuente>_fichas.checkpoint.json "
+                         "sin volver a descargar lo ya guardado (implica --checkpoint)")
+    ap.add_argument("--frontier", choices=["set", "bloom"], default="set",
+                    help="Deduplicación de fichas de PatioTuerca: set exacto o filtro de Bloom compacto")
+    ap.add_argument("--frontier-capacity", type=int, default=1_000_000,
+                    help="Claves previstas para dimensionar el filtro de Bloom (error ≈0,1%%)")
+    ap.add_argument("--frontier-persist", action="store_true",
+                    help="Guarda la frontera en datos/<fuente>_fichas.frontier y la reutiliza entre corridas "
+                         "durante --fresh-days: pasado ese plazo se descarta y se empieza de cero")
+    ap.add_argument("--listing-base", action="append", default=[],
+                    help="URL base de listados de PatioTuerca (repetible; por defecto autos y pesados)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Autocor: deja de paginar en la primera página cuyas fichas ya están guardadas "
+                         "y no son posteriores a la marca de la última corrida (datos/autocor_fichas.sync.json)")
+    ap.add_argument("--full-sweep-days", type=float, default=7.0,
+                    help="Con --incremental, cada cuántos días se recorre igual el catálogo completo")
+    ap.add_argument("--history", action="store_true",
+                    help="Guarda los cambios de precio, kilometraje y estado de cada ficha en "
+                         "datos/<fuente>_fichas.historial.sqlite (solo lo que cambia, con fecha); "
+                         "con --shard se registra al fusionar con --merge-shards")
+    ap.add_argument("--metrics-json", default=None,
+                    help="Escribe el reporte de métricas de la corrida (JSON) en esta ruta")
+    ap.add_argument("--metrics-prom", default=None,
+                    help="Escribe las métricas en formato Prometheus (textfile collector), p. ej. "
+                         "/var/lib/node_exporter/textfile/autoscraper.prom")
+    ap.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                    help="DEBUG muestra cada página, ficha y registro traducido; INFO, progreso resumido")
+    ap.add_argument("--log-file", default=None,
+                    help="Además de la consola, escribe el log en este archivo")
     ap.add_argument("--user-agent", default="Mozilla/5.0 (Windows NT 10.0; Win64; x64) Scraper/1.0")
 
-    args = ap.parse_args()
+    return ap.parse_args()
+
 
-    BASE_URLS = {
-        "autocor": "https://www.autocor.com.ec/api/listPilot",
-        "patiotuerca": "https://ecuador.patiotuerca.com/usados/-/autos",
-    }
+def parse_sources(args: argparse.Namespace) -> list[str]:
+    """Fuentes a ejecutar: --sources (lista o 'all') o, si se omite, --source."""
+    if not args.sources:
+        return [args.source]
+    if args.sources.strip() == "all":
+        return list(BASE_URLS)
+    sources = [s.strip() for s in args.sources.split(",") if s.strip()]
+    unknown = [s for s in sources if s not in BASE_URLS]
+    if unknown:
+        raise SystemExit(f"Fuentes desconocidas: {', '.join(unknown)} (disponibles: {', '.join(BASE_URLS)})")
+    return list(dict.fromkeys(sources))
 
+
+def build_config(args: argparse.Namespace, source: str) -> AppConfig:
+    """AppConfig de una fuente; --base-url solo aplica cuando se ejecuta una única fuente."""
+    budgets = parse_pares(args.budgets)
+    out_csv = f"datos/{source}_fichas.csv"
+    shard = parse_shard(args.shard) if args.shard else None
+    if shard:
+        out_csv = ruta_shard(out_csv, *shard)
     cfg = AppConfig(
-        base_url=args.base_url or BASE_URLS[args.source],
-        out_csv=f"datos/{args.source}_fichas.csv",
+        base_url=(args.base_url if not args.sources else None) or BASE_URLS[source],
+        out_csv=out_csv,
         timeout=args.timeout,
+        connect_timeout=max(0.1, float(args.connect_timeout)),
         retries=args.retries,
         fresh_days=max(0, int(args.fresh_days)),
         user_agent=args.user_agent,
+        concurrency=max(1, int(budgets.get(source, args.concurrency))),
+        batch_size=max(1, int(args.batch_size)),
+        engine=args.engine,
+        rate_per_host=args.rate,
+        pacing=args.pacing,
+        parser=args.parser,
+        parse_workers=max(0, int(args.parse_workers)),
+        max_rate=args.max_rate,
+        store=args.store,
+        journal_max_mb=max(1, int(args.journal_max_mb)),
+        cache_dir=args.cache_dir,
+        cache_max_mb=max(1, int(args.cache_max_mb)),
+        cache_ttls=parse_pares(args.cache_ttl),
+        shard=shard,
+        resume=args.resume,
+        checkpoint=args.checkpoint or args.resume,
+        checkpoint_interval=max(0.0, float(args.checkpoint_interval)),
+        frontier=args.frontier,
+        frontier_capacity=max(1, int(args.frontier_capacity)),
+        frontier_persist=args.frontier_persist,
+        listing_bases=list(args.listing_base),
+        history=args.history,
+        incremental=args.incremental,
+        full_sweep_days=max(0.0, float(args.full_sweep_days)),
     )
 
-    return cfg, args.source
+    return cfg
 
 
-# -------------------------
-# Ejecución principal
-# -------------------------
+def parse_pares(spec: str) -> dict[str, int]:
+    """'a=1,b=2' → {'a': 1, 'b': 2} (TTLs de caché, presupuestos por fuente)."""
+    pares = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = part.partition("=")
+        pares[name.strip()] = int(value)
+    return pares
+
+
+def build_cache(cfg: AppConfig) -> HttpCache | None:
+    if not cfg.cache_dir:
+        return None
+    return HttpCache(cfg.cache_dir, ttls=cfg.cache_ttls, max_bytes=cfg.cache_max_mb * 1024 * 1024)
+
+
+def build_pacer(cfg: AppConfig, source: str) -> AimdPacer | None:
+    if cfg.pacing != "adaptive":
+        return None
+    if source == "autocor":
+        # API JSON rápida: arranca alto y acompaña a la concurrencia
+        return AimdPacer(rate=2.0 * cfg.concurrency, max_rate=cfg.max_rate or 25.0, increase=0.5)
+    # HTML de PatioTuerca: arranca cerca de las pausas fijas (≈1 petición/s)
+    return AimdPacer(rate=1.0, max_rate=cfg.max_rate or 4.0)
+
+
+def sqlite_path(cfg: AppConfig) -> str:
+    return os.path.splitext(cfg.out_csv)[0] + ".sqlite"
+
+
+def history_path(cfg: AppConfig) -> str:
+    return os.path.splitext(cfg.out_csv)[0] + ".historial.sqlite"
+
+
+def build_merger(cfg: AppConfig) -> MergeService:
+    """
+    Merge con la política de vigencia de --fresh-days y, con --history, el historial de cambios.
+    Un shard no escribe historial: su salida parcial no es el dataset completo (todo sería alta);
+    los cambios se registran al fusionar los parciales contra la salida final (merge_shards).
+    """
+    historial = HistorialCambios(history_path(cfg)) if cfg.history and not cfg.shard else None
+    return MergeService(ByDaysFreshnessPolicy(cfg.fresh_days), on_change=historial)
+
+
+def transport_state_path(cfg: AppConfig) -> str:
+    return os.path.splitext(cfg.out_csv)[0] + ".transporte.json"
+
+
+def build_transport(cfg: AppConfig, source: str) -> Transporte:
+    """Sesión HTTP de la fuente: pool del tamaño de la concurrencia, reintentos y timeouts."""
+    return Transporte(
+        cfg.user_agent,
+        concurrency=cfg.concurrency,
+        retries=max(0, int(cfg.retries)),
+        connect_timeout=cfg.connect_timeout,
+        read_timeout=cfg.timeout,
+        fuente=source,
+        accept="application/json" if source == "autocor" else None,
+        # Autocor: recuerda si la API acepta GET o POST para no probar ambos cada corrida
+        estado_path=transport_state_path(cfg) if source == "autocor" else None,
+        # El POST ?page=N de Autocor es una consulta de solo lectura: se reintenta como un GET
+        metodos=IDEMPOTENTES | {"POST"} if source == "autocor" else IDEMPOTENTES,
+    )
+
+
+def sync_path(cfg: AppConfig) -> str:
+    return os.path.splitext(cfg.out_csv)[0] + ".sync.json"
+
+
+def checkpoint_path(cfg: AppConfig) -> str:
+    return os.path.splitext(cfg.out_csv)[0] + ".checkpoint.json"
 
-def main() -> None:
-    cfg, source = parse_args()
+
+def build_frontier(cfg: AppConfig) -> UrlFrontier:
+    path = None
+    if cfg.frontier_persist:
+        path = os.path.splitext(cfg.out_csv)[0] + (".frontier.bloom" if cfg.frontier == "bloom" else ".frontier")
+    return UrlFrontier(path, bloom_capacidad=cfg.frontier_capacity if cfg.frontier == "bloom" else None,
+                       vigencia=cfg.fresh_days * 86400)
+
+
+def build_app(source: str, cfg: AppConfig, cache: HttpCache | None = None) -> App:
+    """Arma cliente, traductor, repositorio y merger de una fuente (la caché puede ser compartida)."""
+    cache = cache or build_cache(cfg)
 
     # Selección de componentes según la fuente
     if source == "autocor":
@@ -65,26 +302,208 @@ def main() -> None:
         api = RequestsApiClient(
             base_url=cfg.base_url,
             user_agent=cfg.user_agent,
-            timeout=cfg.timeout,
-            retries=cfg.retries,
+            concurrency=cfg.concurrency,
+            cache=cache,
+            pacer=build_pacer(cfg, source),
+            transporte=build_transport(cfg, source),
         )
         translator = AutocorRecordTranslator()
-        merger = MergeService(ByDaysFreshnessPolicy(cfg.fresh_days))
 
     else:
         # --- PATIOTUERCA ---
-        web_client = RequestsWebClient(user_agent=cfg.user_agent, timeout=cfg.timeout)
-        # años a scrapear → ajustable en modelo
-        api = PatioTuercaClientAdapter(web_client, anios=ANIOS_OBJETIVO)
+        web_client = RequestsWebClient(
+            user_agent=cfg.user_agent,
+            cache=cache,
+            pacer=build_pacer(cfg, source),
+            transporte=build_transport(cfg, source),
+        )
+        FichaExtractor.motor = cfg.parser
+        # años a scrapear → ajustable en modelo; con --shard, solo las unidades de este shard
+        unidades = None
+        if cfg.shard or cfg.listing_bases:
+            unidades = unidades_de_trabajo(ANIOS_OBJETIVO, cfg.listing_bases or URL_BASE)
+        if cfg.shard:
+            unidades = unidades_del_shard(unidades, *cfg.shard)
+        api = PatioTuercaClientAdapter(
+            web_client,
+            anios=ANIOS_OBJETIVO,
+            engine=cfg.engine,
+            concurrency=cfg.concurrency,
+            rate_per_host=cfg.rate_per_host,
+            parse_workers=cfg.parse_workers,
+            unidades=unidades,
+            frontera=build_frontier(cfg),
+        )
         translator = PatioTuercaRecordTranslator()
-        merger = MergeService(ByDaysFreshnessPolicy(cfg.fresh_days))
 
-    # Repositorio en CSV 
-    repo = CsvRepository(cfg.out_csv)
+    repo = build_repo(cfg)
+    merger = build_merger(cfg)
+    # Solo con --checkpoint / --resume; se lee únicamente con --resume
+    checkpoint = None
+    if cfg.checkpoint:
+        checkpoint = CrawlCheckpoint(checkpoint_path(cfg), reanudar=cfg.resume,
+                                     intervalo=cfg.checkpoint_interval)
+    incremental = None
+    if cfg.incremental and source == "autocor":
+        incremental = SincroniaIncremental(sync_path(cfg), barrido_dias=cfg.full_sweep_days)
+    return App(api=api, translator=translator, repo=repo, merger=merger, batch_size=cfg.batch_size,
+               checkpoint=checkpoint, source=source, incremental=incremental,
+               referencia=build_reference(cfg) if cfg.shard else None)
+
+
+def build_repo(cfg: AppConfig, path: str | None = None):
+    """Repositorio según --store: CSV (reescritura completa o diario + compactación) o SQLite."""
+    path = path or cfg.out_csv
+    if cfg.store == "sqlite":
+        return SqliteRepository(os.path.splitext(path)[0] + ".sqlite")
+    elif cfg.store == "journal":
+        return JournaledCsvRepository(path, max_journal_bytes=cfg.journal_max_mb * 1024 * 1024)
+    else:
+        return CsvRepository(path)
+
+
+def build_reference(cfg: AppConfig) -> SalidaFinal | None:
+    """
+    Salida final de un shard (solo lectura): índice de vigencia y de hash para omitir las
+    fichas vigentes y detectar cambios contra lo ya guardado. None si todavía no existe.
+    """
+    final = ruta_final(cfg.out_csv)
+    if cfg.store == "sqlite":
+        path = os.path.splitext(final)[0] + ".sqlite"
+        if not os.path.exists(path):
+            return None
+        return SalidaFinal(SqliteRepository(path, solo_lectura=True))
+    return SalidaFinal(build_repo(cfg, final))
+
+
+def merge_shards(cfg: AppConfig, total: int = 0) -> None:
+    """
+    Fusiona datos/<fuente>_fichas.shard-i-of-N.* en la salida final con MergeService y
+    borra los parciales fusionados. Sin `total`, N se deduce de los parciales existentes.
+    """
+    ext = ".sqlite" if cfg.store == "sqlite" else ".csv"
+    final = os.path.splitext(cfg.out_csv)[0] + ext
+    if not total:
+        totales = totales_shards(final)
+        if len(totales) > 1:
+            raise SystemExit(f"Hay parciales de shards con distinto N ({totales}) para {final}: "
+                             f"indica cuál fusionar con --merge-shards N")
+        total = totales[0] if totales else 0
+    rutas = rutas_shards(final, total) if total else []
+    if not rutas:
+        raise SystemExit(f"No hay salidas parciales de shards para {final}")
+    if len(rutas) < total:
+        log.warning("⚠️ Solo hay %d de %d salidas parciales de shards para %s", len(rutas), total, final)
+    parciales = [build_repo(cfg, os.path.splitext(p)[0] + ".csv") for p in rutas]
+    destino = build_repo(cfg)
+    historial = HistorialCambios(history_path(cfg)) if cfg.history else None
+    try:
+        metrics = fusionar_shards(destino, parciales,
+                                  MergeService(ByDaysFreshnessPolicy(cfg.fresh_days), on_change=historial))
+    finally:
+        for parte in (destino, *parciales, historial):
+            if hasattr(parte, "close"):
+                parte.close()
+    retirar_shards(rutas)
+    log.info("✓ Shards fusionados: %s → Total filas: %s | kept=%s | updated=%s | refreshed=%s | added=%s",
+             metrics["shards"], metrics["total"], metrics["kept"], metrics["updated"], metrics["refreshed"],
+             metrics["added"])
+    log.info("✓ Salida final: %s", destino.path)
+
+
+# Opciones con un archivo de salida: cada proceso de --local-shards escribe el suyo (…shard-i-of-N…)
+SALIDAS_POR_SHARD = ("--metrics-json", "--log-file")
+
+
+def run_local_shards(n: int, args: argparse.Namespace) -> bool:
+    """Lanza N procesos de este mismo comando, uno por shard. True si todos terminan bien."""
+    quitar = ("--local-shards", "--metrics-prom", *SALIDAS_POR_SHARD)
+    argv, skip = [], False
+    for arg in sys.argv[1:]:
+        if skip:
+            skip = False
+            continue
+        if arg in quitar:
+            skip = True
+            continue
+        if not arg.startswith(tuple(f"{q}=" for q in quitar)):
+            argv.append(arg)
+    if args.metrics_prom:
+        # N archivos con las mismas series romperían el textfile collector
+        log.warning("⚠️ --metrics-prom no aplica a los procesos de --local-shards; usa --metrics-json")
+    procs = []
+    for i in range(1, n + 1):
+        propias = []
+        for opcion in SALIDAS_POR_SHARD:
+            ruta = getattr(args, opcion[2:].replace("-", "_"))
+            if ruta:
+                propias += [opcion, ruta_shard(ruta, i, n)]
+        procs.append(subprocess.Popen([sys.executable, "-m", "paginas.Autoscraper.main", *argv, *propias,
+                                       "--shard", f"{i}/{n}"]))
+    codes = [p.wait() for p in procs]
+    for i, code in enumerate(codes, start=1):
+        log.log(logging.INFO if code == 0 else logging.ERROR,
+                "%s shard %d/%d: código de salida %s", "✓" if code == 0 else "✗", i, n, code)
+    return all(code == 0 for code in codes)
+
+
+# -------------------------
+# Ejecución principal
+# -------------------------
+
+def main() -> None:
+    args = parse_args()
+    listener = configurar_logging(args.log_level, args.log_file)
+    try:
+        ejecutar(args)
+    finally:
+        listener.stop()  # vacía la cola antes de salir
+
+
+def ejecutar(args: argparse.Namespace) -> None:
+    sources = parse_sources(args)
+    if (args.shard or args.local_shards) and sources != ["patiotuerca"]:
+        raise SystemExit("--shard / --local-shards solo aplican a --source patiotuerca")
+    configs = {source: build_config(args, source) for source in sources}
+
+    if args.merge_shards is not None:
+        for cfg in configs.values():
+            merge_shards(cfg, args.merge_shards)
+        return
+
+    if args.local_shards > 0:
+        if not run_local_shards(args.local_shards, args):
+            raise SystemExit(1)
+        merge_shards(configs["patiotuerca"], args.local_shards)
+        return
+
+    if args.import_csv:
+        for cfg in configs.values():
+            n = importar_csv_a_sqlite(cfg.out_csv, sqlite_path(cfg))
+            log.info("✓ Importadas %d filas de %s → %s", n, cfg.out_csv, sqlite_path(cfg))
+        return
+
+    try:
+        if len(sources) > 1:
+            # Todas las fuentes a la vez, cada una con su presupuesto de concurrencia
+            cache = build_cache(configs[sources[0]])  # un solo índice sobre el directorio de caché
+            resultados = Orquestador({s: build_app(s, cfg, cache) for s, cfg in configs.items()}).run()
+            if any("error" in r for r in resultados.values()):
+                raise SystemExit(1)
+            return
 
-    # Crear app y ejecutar
-    app = App(api=api, translator=translator, repo=repo, merger=merger)
-    app.run()
+        # Crear app y ejecutar
+        app = build_app(sources[0], configs[sources[0]])
+        try:
+            app.run()
+        finally:
+            app.close()
+    finally:
+        # También tras un fallo: el reporte dice hasta dónde llegó la corrida
+        if args.metrics_json:
+            METRICAS.escribir_json(args.metrics_json)
+        if args.metrics_prom:
+            METRICAS.escribir_prometheus(args.metrics_prom)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+import logging, time
+from paginas.Autoscraper.app import App
+
+log = logging.getLogger(__name__)
+
+
+class Orquestador:
+    """
+    Ejecuta varias fuentes a la vez en un mismo proceso, una App por fuente y cada
+    una en su propio hilo. La concurrencia de cada fuente (su presupuesto) va en su
+    propio cliente, así que una fuente lenta no le quita turnos a la rápida.
+    """
+
+    def __init__(self, apps: Dict[str, App]):
+        self.apps = apps
+
+    def _ejecutar(self, source: str, app: App) -> Dict[str, Any]:
+        t0 = time.monotonic()
+        try:
+            resultado: Dict[str, Any] = dict(app.run() or {})
+        except Exception as e:
+            log.exception("❌ %s: %s", source, e)
+            resultado = {"error": str(e)}
+        finally:
+            app.close()
+        resultado["segundos"] = round(time.monotonic() - t0, 1)
+        return resultado
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """Corre todas las fuentes y devuelve las métricas de cada una (con 'error' si falló)."""
+        log.info("▶ Ejecutando fuentes en paralelo: %s", ", ".join(self.apps))
+        t0 = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(self.apps), thread_name_prefix="fuente") as pool:
+            futuros = {source: pool.submit(self._ejecutar, source, app) for source, app in self.apps.items()}
+            resultados = {source: fut.result() for source, fut in futuros.items()}
+        self._resumen(resultados, time.monotonic() - t0)
+        return resultados
+
+    @staticmethod
+    def _resumen(resultados: Dict[str, Dict[str, Any]], total_s: float) -> None:
+        log.info("================ Resumen de fuentes ================")
+        for source, r in resultados.items():
+            if "error" in r:
+                log.error("✗ %s: ERROR tras %ss → %s", source, r["segundos"], r["error"])
+                continue
+            log.info(
+                "✓ %s: %ss | total=%s | kept=%s | updated=%s | refreshed=%s | added=%s | skipped=%s",
+                source, r["segundos"], r.get("total", 0), r.get("kept", 0), r.get("updated", 0),
+                r.get("refreshed", 0), r.get("added", 0), r.get("skipped", 0),
+            )
+        secuencial = sum(r["segundos"] for r in resultados.values())
+        log.info("✓ Tiempo total: %.1fs (en secuencia habría sido ≈%.1fs)", total_s, secuencial)